@@ -16,7 +16,8 @@ def retry_api_call(
     delay: float = 1.0,
     backoff: float = 2.0,
     exceptions: Optional[Tuple[Type[Exception], ...]] = None,
-    verbose: bool = True
+    verbose: bool = True,
+    max_total_delay: Optional[float] = None
 ):
     """
     Decorator to retry API calls with exponential backoff.
@@ -29,6 +30,12 @@ def retry_api_call(
     :param backoff: Multiplier for delay after each retry (default: 2.0)
     :param exceptions: Tuple of exception types to catch and retry. If None, catches all exceptions
     :param verbose: Whether to print retry messages (default: True)
+    :param max_total_delay: Cap on the total time spent waiting between attempts. A retry that
+                            would exceed it is not attempted and the exception is raised instead.
+                            If None, waits are not capped (default: None)
+    
+    An exception carrying a numeric `retry_after` attribute (seconds the server asked the
+    client to wait) is retried after that delay instead of the exponential backoff one.
     
     :return: Decorated function with retry logic
     
@@ -47,6 +54,7 @@ def retry_api_call(
         @wraps(func)
         def wrapper(*args, **kwargs) -> T:
             current_delay = delay
+            total_delay = 0.0
             last_exception = None
 
             for attempt in range(1, max_retries + 1):
@@ -61,10 +69,18 @@ def retry_api_call(
                     last_exception = e
                     
                     if attempt < max_retries:
+                        retry_after = getattr(e, "retry_after", None)
+                        wait = current_delay if retry_after is None else retry_after
+                        if max_total_delay is not None and total_delay + wait > max_total_delay:
+                            if verbose:
+                                print(f"API call '{func.__name__}' failed (attempt {attempt}/{max_retries}): {str(e)}")
+                                print(f"Not retrying: waiting {wait:.1f} seconds would exceed {max_total_delay:.1f} seconds")
+                            raise
                         if verbose:
                             print(f"API call '{func.__name__}' failed (attempt {attempt}/{max_retries}): {str(e)}")
-                            print(f"Retrying in {current_delay:.1f} seconds...")
-                        time.sleep(current_delay)
+                            print(f"Retrying in {wait:.1f} seconds...")
+                        time.sleep(wait)
+                        total_delay += wait
                         current_delay *= backoff
                     else:
                         if verbose:
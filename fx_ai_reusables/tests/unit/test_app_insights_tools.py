@@ -0,0 +1,296 @@
+"""
+Unit tests for the App Insights tools' result handling
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from azure.monitor.query import LogsQueryStatus
+
+from fx_ai_reusables.tools import app_insights_tools
+from fx_ai_reusables.tools.app_insights_tools import (
+    create_correlate_errors_and_metrics_tool,
+    create_find_first_occurrence_tool,
+    create_get_error_trends_analysis_tool,
+    _get_background_loop,
+    _on_background_loop,
+    _rows_as,
+    _run_async,
+)
+
+
+def _table(columns, rows):
+    """Build a stand-in for a LogsTable with the given column names and rows."""
+    return SimpleNamespace(columns=columns, rows=rows)
+
+
+class TestRowsAs:
+    """Test suite for unpacking named fields from query result rows."""
+
+    def test_yields_fields_in_requested_order(self):
+        """Test that fields come back in argument order, not column order."""
+        table = _table(["timestamp", "count", "name"], [["t1", 3, "a"], ["t2", 5, "b"]])
+
+        assert list(_rows_as(table, "name", "count")) == [("a", 3), ("b", 5)]
+
+    def test_single_field_yields_one_tuples(self):
+        """Test that a single field still unpacks as a 1-tuple."""
+        table = _table(["timestamp", "count"], [["t1", 3]])
+
+        assert list(_rows_as(table, "count")) == [(3,)]
+
+    def test_missing_column_defaults_to_none(self):
+        """Test that a field absent from a sparse (fuzzy union) table is None rather than an error."""
+        table = _table(["timestamp", "type", "first_seen"], [["t1", "SqlException", "t0"]])
+
+        rows = list(_rows_as(table, "timestamp", "message", "type", "first_seen"))
+
+        assert rows == [("t1", None, "SqlException", "t0")]
+
+    def test_table_without_schema_yields_nothing(self):
+        """Test that an empty result with no columns is tolerated."""
+        assert list(_rows_as(_table([], []), "timestamp", "count")) == []
+
+
+class TestBackgroundLoop:
+    """Test suite for running tool coroutines on the module's shared loop."""
+
+    @staticmethod
+    @_on_background_loop
+    async def _running_loop():
+        """Report the loop the tool body runs on."""
+        return asyncio.get_running_loop()
+
+    def test_sync_callers_run_on_background_loop(self):
+        """Test that _run_async schedules the coroutine on the background loop."""
+        assert _run_async(self._running_loop()) is _get_background_loop()
+
+    def test_async_callers_run_on_background_loop(self):
+        """Test that awaiting from another loop still runs the body on the background loop."""
+        assert asyncio.run(self._running_loop()) is _get_background_loop()
+
+    def test_run_async_from_background_loop_raises_instead_of_deadlocking(self):
+        """Test that a sync wrapper reached from the background loop fails fast."""
+        @_on_background_loop
+        async def nested_sync_call():
+            return _run_async(self._running_loop())
+
+        with pytest.raises(RuntimeError):
+            _run_async(nested_sync_call())
+
+
+def _result(*tables):
+    """Build a stand-in for a successful LogsQueryResult."""
+    return SimpleNamespace(status=LogsQueryStatus.SUCCESS, tables=list(tables))
+
+
+class _FakeLogsClient:
+    """Async logs client answering each query with the result whose marker the query contains."""
+
+    def __init__(self, results_by_marker):
+        self.results_by_marker = results_by_marker
+
+    async def query_resource(self, resource_id, query, timespan=None):
+        for marker, result in self.results_by_marker.items():
+            if marker in query:
+                return result
+        raise AssertionError(f"Unexpected query: {query}")
+
+
+@pytest.fixture
+def secret_retriever():
+    """Secret retriever without a service principal, so the default credential would be used."""
+    retriever = AsyncMock()
+    retriever.retrieve_optional_secret_value.return_value = None
+    retriever.retrieve_mandatory_secret_value.return_value = "/subscriptions/sub/resource"
+    return retriever
+
+
+@pytest.fixture
+def logs_results(monkeypatch):
+    """Route the tools' queries to canned results keyed by a marker in the query text."""
+    results_by_marker = {}
+    monkeypatch.setattr(
+        app_insights_tools, "_get_logs_client", lambda *credentials: _FakeLogsClient(results_by_marker)
+    )
+    return results_by_marker
+
+
+class TestCorrelateErrorsAndMetrics:
+    """Test suite for the output shape of correlate_errors_and_metrics."""
+
+    COLUMNS = [
+        "metric", "timestamps", "error_rates", "failed_counts", "total_errors", "avg_error_rate",
+        "peak_error_rate", "peak_error_time", "correlation", "peak_value", "normal_value", "breach_count"
+    ]
+
+    def _run(self, secret_retriever):
+        tool = create_correlate_errors_and_metrics_tool(secret_retriever)
+        return asyncio.run(tool.coroutine(start_date="2024-01-15T10:00:00Z", end_date="2024-01-15T12:00:00Z"))
+
+    def test_builds_summary_timeline_and_correlations(self, secret_retriever, logs_results):
+        """Test that the summary row and per-metric rows map onto the documented result."""
+        summary_row = [
+            "",
+            json.dumps(["2024-01-15T10:00:00.0000000Z", "2024-01-15T10:01:00.0000000Z"]),
+            json.dumps([0.0, 45.5]),
+            json.dumps([0, 12]),
+            12, 22.8, 45.5, datetime(2024, 1, 15, 10, 1, tzinfo=timezone.utc),
+            None, None, None, None
+        ]
+        cpu_row = ["% Processor Time", None, None, None, None, None, None, None, 0.91, 94.5, 45.0, 3]
+        response_time_row = ["response_time_ms", None, None, None, None, None, None, None, 0.2, 5200.0, 200.0, 0]
+        logs_results["make-series"] = _result(_table(self.COLUMNS, [summary_row, cpu_row, response_time_row]))
+
+        result = self._run(secret_retriever)
+
+        assert result["status"] == "success"
+        assert result["error_summary"] == {
+            "total_errors": 12,
+            "avg_error_rate": 22.8,
+            "peak_error_time": "2024-01-15T10:01:00+00:00",
+            "peak_error_rate": 45.5
+        }
+        assert result["timeline_analysis"]["error_timeline"] == [
+            {"timestamp": "2024-01-15T10:00:00+00:00", "error_rate": 0.0, "failed_requests": 0},
+            {"timestamp": "2024-01-15T10:01:00+00:00", "error_rate": 45.5, "failed_requests": 12},
+        ]
+        assert result["timeline_analysis"]["metrics_available"] == ["% Processor Time"]
+        cpu, response_time = result["metric_correlations"]
+        assert cpu == {
+            "metric": "cpu_percentage",
+            "correlation_score": 0.91,
+            "correlation": "HIGH",
+            "finding": "Errors increase when CPU > 80%",
+            "peak_value": 94.5,
+            "normal_value": 45.0
+        }
+        assert response_time["correlation"] == "LOW"
+        assert result["root_cause_hypothesis"] == ["CPU saturation is likely causing timeouts and errors"]
+
+    def test_no_data_returns_empty_analysis(self, secret_retriever, logs_results):
+        """Test that an empty result still returns the full, zeroed shape."""
+        logs_results["make-series"] = _result(_table(self.COLUMNS, []))
+
+        result = self._run(secret_retriever)
+
+        assert result["status"] == "success"
+        assert result["error_summary"]["total_errors"] == 0
+        assert result["timeline_analysis"]["error_timeline"] == []
+        assert result["metric_correlations"] == []
+
+
+class TestGetErrorTrendsAnalysis:
+    """Test suite for the output shape of get_error_trends_analysis."""
+
+    def test_builds_current_baseline_and_hourly_comparison(self, secret_retriever, logs_results):
+        """Test that the summary, hourly and baseline queries map onto the documented result."""
+        logs_results["unique_error_types"] = _result(_table(
+            ["error_type", "count", "total_errors", "unique_error_types"],
+            [["SqlException", 30, 40, 2], ["ValidationException", 10, 40, 2]]
+        ))
+        logs_results["bin(timestamp, 1h)"] = _result(_table(
+            ["timestamp", "total", "errors", "error_rate"],
+            [
+                [datetime(2024, 1, 15, 10, tzinfo=timezone.utc), 100, 5, 5.0],
+                [datetime(2024, 1, 15, 11, tzinfo=timezone.utc), 100, 35, 35.0],
+            ]
+        ))
+        logs_results["hourly_avg_errors"] = _result(_table(
+            ["total_requests", "total_errors", "hourly_avg_errors", "anomaly_start"],
+            [[10000, 168, 1.0, datetime(2024, 1, 15, 11, 5, tzinfo=timezone.utc)]]
+        ))
+        tool = create_get_error_trends_analysis_tool(secret_retriever)
+
+        result = asyncio.run(tool.coroutine(start_date="2024-01-15T10:00:00Z", end_date="2024-01-15T12:00:00Z"))
+
+        assert result["status"] == "success"
+        assert result["current_period"]["total_errors"] == 40
+        assert result["current_period"]["unique_error_types"] == 2
+        assert result["current_period"]["most_common_errors"] == [
+            {"type": "SqlException", "count": 30, "percentage": 75.0},
+            {"type": "ValidationException", "count": 10, "percentage": 25.0},
+        ]
+        assert result["baseline_period"]["avg_errors_per_hour"] == 1.0
+        assert result["hourly_comparison"] == [
+            {"hour": "2024-01-15T10:00:00+00:00", "errors": 5, "baseline_avg": 1, "deviation": "+400%"},
+            {"hour": "2024-01-15T11:00:00+00:00", "errors": 35, "baseline_avg": 1, "deviation": "+3400%"},
+        ]
+        assert result["trend_analysis"]["trend"] == "CRITICAL_INCREASE"
+        assert result["trend_analysis"]["anomaly_start_time"] == "2024-01-15T11:05:00+00:00"
+        assert result["pattern_detection"]["pattern"] == "SUDDEN_SPIKE"
+        assert result["new_error_types"] == ["SqlException - new in current period"]
+
+
+class TestFindFirstOccurrence:
+    """Test suite for find_first_occurrence result parsing."""
+
+    FIRST_COLUMNS = [
+        "timestamp", "operation_Id", "itemType", "message", "innermostMessage", "type", "method",
+        "name", "url", "duration", "cloud_RoleName", "customDimensions"
+    ]
+    FIRST_SEEN = datetime(2024, 1, 15, 10, 0, tzinfo=timezone.utc)
+
+    @pytest.fixture
+    def first_occurrence_results(self, logs_results):
+        """Canned first-occurrence and timeline results; a second, later row must be ignored."""
+        logs_results["arg_min"] = _result(_table(self.FIRST_COLUMNS, [
+            [self.FIRST_SEEN, "op-1", "exception", None, "Timeout expired", "SqlException", None,
+             "POST /api/orders", None, 4400.0, "orders-api", "{}"],
+            [datetime(2024, 1, 15, 11, 0, tzinfo=timezone.utc), "op-2", "request", "later", None, None, None,
+             "GET /api/other", None, 10.0, "other-api", "{}"],
+        ]))
+        logs_results["bin(timestamp, 5m)"] = _result(_table(["timestamp", "count"], [
+            [self.FIRST_SEEN, 1],
+            [datetime(2024, 1, 15, 10, 5, tzinfo=timezone.utc), 4],
+        ]))
+        return logs_results
+
+    def _run(self, secret_retriever, include_context):
+        tool = create_find_first_occurrence_tool(secret_retriever)
+        return asyncio.run(tool.coroutine("Timeout", "message", 24, include_context))
+
+    def test_first_row_maps_onto_named_fields(self, secret_retriever, first_occurrence_results):
+        """Test that only the first row is read and its columns land in the right fields."""
+        result = self._run(secret_retriever, include_context=False)
+
+        assert result["status"] == "success"
+        assert result["first_occurrence"] == {
+            "timestamp": "2024-01-15T10:00:00+00:00",
+            "operation_id": "op-1",
+            "error_message": "Timeout expired",
+            "exception_type": "SqlException",
+            "endpoint": "POST /api/orders",
+            "duration_ms": 4400.0,
+            "service": "orders-api",
+            "item_type": "exception"
+        }
+        assert result["search_metadata"]["total_occurrences_found"] == 5
+
+    def test_no_rows_reports_not_found(self, secret_retriever, logs_results):
+        """Test that an empty first-occurrence result is a NotFound error, not an exception."""
+        logs_results["arg_min"] = _result(_table(self.FIRST_COLUMNS, []))
+        logs_results["bin(timestamp, 5m)"] = _result(_table(["timestamp", "count"], []))
+
+        result = self._run(secret_retriever, include_context=False)
+
+        assert result["error_type"] == "NotFound"
+
+    def test_context_without_traces_table(self, secret_retriever, first_occurrence_results):
+        """Test that a fuzzy-union context result missing the traces columns is still parsed."""
+        first_occurrence_results["first_seen"] = _result(_table(
+            ["first_seen", "type", "count"],
+            [[datetime(2024, 1, 15, 9, 55, tzinfo=timezone.utc), "HttpRequestException", 3]]
+        ))
+
+        result = self._run(secret_retriever, include_context=True)
+
+        assert result["status"] == "success"
+        assert result["context"] == {
+            "events_before": [],
+            "concurrent_errors": ["HttpRequestException (started 2024-01-15T09:55:00+00:00)"]
+        }
@@ -0,0 +1,376 @@
+"""
+Unit tests for the GitHub tools' request helpers
+"""
+
+import time
+
+import pytest
+import requests
+
+from fx_ai_reusables.tools import github_tools
+from fx_ai_reusables.tools.github_tools import (
+    _credential_fingerprint,
+    _RateLimiter,
+    _RateLimitExceeded,
+    _TransientHTTPError,
+    _TTLCache,
+    _fetch_commit,
+    _find_blame_range,
+    _get_blame_ranges_cached,
+    _get_graphql_blame_for_lines,
+    _raise_for_status_transient_aware,
+)
+
+
+def _response(status_code, headers=None):
+    """Build a bare requests.Response with the given status and headers."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.url = "https://api.github.com/repos/owner/repo"
+    return response
+
+
+class TestRateLimiter:
+    """Test suite for the per-token rate-limit governor."""
+
+    def test_update_ignores_responses_without_rate_limit_headers(self):
+        """Test that pacing is unchanged when the headers are missing."""
+        limiter = _RateLimiter(min_interval=0.1)
+        limiter.update({})
+
+        assert limiter._interval == 0.1
+        assert limiter._next_start == 0.0
+
+    def test_update_keeps_min_interval_above_buffer(self):
+        """Test that plenty of remaining budget keeps the minimum interval."""
+        limiter = _RateLimiter(min_interval=0.1, remaining_buffer=100)
+        limiter.update({"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": str(time.time() + 3600)})
+
+        assert limiter._interval == 0.1
+
+    def test_update_spreads_remaining_budget_below_buffer(self):
+        """Test that a low budget is spread evenly until the window resets."""
+        limiter = _RateLimiter(min_interval=0.1, remaining_buffer=100)
+        limiter.update({"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(time.time() + 100)})
+
+        assert limiter._interval == pytest.approx(10.0, rel=0.05)
+
+    def test_update_restores_min_interval_after_reset(self):
+        """Test that a refilled budget drops back to the minimum interval."""
+        limiter = _RateLimiter(min_interval=0.1, remaining_buffer=100)
+        limiter.update({"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": str(time.time() + 100)})
+        limiter.update({"X-RateLimit-Remaining": "5000", "X-RateLimit-Reset": str(time.time() + 3600)})
+
+        assert limiter._interval == 0.1
+
+    def test_update_exhausted_budget_defers_next_start_until_reset(self):
+        """Test that no budget pushes the next request to the reset time."""
+        limiter = _RateLimiter(min_interval=0.1)
+        limiter.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 30)})
+
+        assert limiter._next_start == pytest.approx(time.monotonic() + 30, abs=1)
+
+    def test_slot_fails_fast_when_wait_exceeds_cap(self):
+        """Test that a wait longer than max_wait raises instead of sleeping."""
+        limiter = _RateLimiter(max_wait=5)
+        limiter.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 3600)})
+
+        started = time.monotonic()
+        with pytest.raises(_RateLimitExceeded):
+            with limiter.slot():
+                pass
+        assert time.monotonic() - started < 1
+
+    def test_slot_waits_for_short_pacing_interval(self):
+        """Test that consecutive slots are spaced by the minimum interval."""
+        limiter = _RateLimiter(min_interval=0.05)
+
+        started = time.monotonic()
+        for _ in range(3):
+            with limiter.slot():
+                pass
+
+        assert time.monotonic() - started >= 0.1
+
+
+class TestRaiseForStatusTransientAware:
+    """Test suite for classifying GitHub error responses as transient or permanent."""
+
+    def test_success_does_not_raise(self):
+        """Test that a 2xx response passes through."""
+        _raise_for_status_transient_aware(_response(200))
+
+    @pytest.mark.parametrize("status_code", [401, 404, 422])
+    def test_permanent_errors_are_not_transient(self, status_code):
+        """Test that client errors raise a plain HTTPError the retry loop will not catch."""
+        with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+            _raise_for_status_transient_aware(_response(status_code))
+
+        assert not isinstance(exc_info.value, _TransientHTTPError)
+
+    @pytest.mark.parametrize("status_code", [429, 500, 502, 503, 504])
+    def test_server_errors_and_429_are_transient(self, status_code):
+        """Test that 5xx and 429 responses are retryable with no server-given wait."""
+        with pytest.raises(_TransientHTTPError) as exc_info:
+            _raise_for_status_transient_aware(_response(status_code))
+
+        assert exc_info.value.retry_after is None
+
+    def test_plain_403_is_permanent(self):
+        """Test that a 403 without rate-limit headers is a permission error."""
+        with pytest.raises(requests.exceptions.HTTPError) as exc_info:
+            _raise_for_status_transient_aware(_response(403, {"X-RateLimit-Remaining": "42"}))
+
+        assert not isinstance(exc_info.value, _TransientHTTPError)
+
+    def test_rate_limited_403_carries_retry_after(self):
+        """Test that a secondary-limit 403 is transient and carries Retry-After without sleeping."""
+        started = time.monotonic()
+        with pytest.raises(_TransientHTTPError) as exc_info:
+            _raise_for_status_transient_aware(_response(403, {"Retry-After": "30"}))
+
+        assert exc_info.value.retry_after == 30.0
+        assert time.monotonic() - started < 1
+
+    def test_exhausted_budget_403_waits_until_reset(self):
+        """Test that a primary-limit 403 carries the time left until X-RateLimit-Reset."""
+        headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 20)}
+        with pytest.raises(_TransientHTTPError) as exc_info:
+            _raise_for_status_transient_aware(_response(403, headers))
+
+        assert exc_info.value.retry_after == pytest.approx(20, abs=1)
+
+
+class TestTTLCache:
+    """Test suite for the LRU/TTL cache behind the commit and pull request tools."""
+
+    def test_get_missing_key_returns_none(self):
+        """Test that an unknown key is a miss."""
+        assert _TTLCache(4).get(("repo", "sha")) is None
+
+    def test_put_then_get_returns_equal_copy(self):
+        """Test that stored values come back equal but not shared."""
+        cache = _TTLCache(4)
+        value = {"files": [{"filename": "a.py"}]}
+        cache.put(("repo", "sha"), value, None)
+
+        cached = cache.get(("repo", "sha"))
+        assert cached == value
+        assert cached is not value
+
+    def test_mutating_results_does_not_corrupt_entry(self):
+        """Test that callers can mutate both the stored and returned dictionaries."""
+        cache = _TTLCache(4)
+        value = {"files": [{"filename": "a.py"}]}
+        cache.put(("repo", "sha"), value, None)
+
+        value["files"].append({"filename": "b.py"})
+        cache.get(("repo", "sha"))["files"].clear()
+
+        assert cache.get(("repo", "sha")) == {"files": [{"filename": "a.py"}]}
+
+    def test_entry_expires_after_ttl(self, monkeypatch):
+        """Test that an entry is dropped once its time to live has passed."""
+        now = [1000.0]
+        monkeypatch.setattr(github_tools.time, "monotonic", lambda: now[0])
+        cache = _TTLCache(4)
+        cache.put(("repo", "abc1234"), {"sha": "full"}, 120)
+
+        now[0] += 119
+        assert cache.get(("repo", "abc1234")) == {"sha": "full"}
+        now[0] += 2
+        assert cache.get(("repo", "abc1234")) is None
+
+    def test_none_ttl_never_expires(self, monkeypatch):
+        """Test that entries stored without a TTL survive any amount of time."""
+        now = [1000.0]
+        monkeypatch.setattr(github_tools.time, "monotonic", lambda: now[0])
+        cache = _TTLCache(4)
+        cache.put(("repo", "sha"), {"sha": "full"}, None)
+
+        now[0] += 10 ** 9
+        assert cache.get(("repo", "sha")) == {"sha": "full"}
+
+    def test_evicts_least_recently_used(self):
+        """Test that the entry not read for longest is evicted at capacity."""
+        cache = _TTLCache(2)
+        cache.put(("a",), 1, None)
+        cache.put(("b",), 2, None)
+        cache.get(("a",))
+        cache.put(("c",), 3, None)
+
+        assert cache.get(("a",)) == 1
+        assert cache.get(("b",)) is None
+        assert cache.get(("c",)) == 3
+
+
+class TestCredentialFingerprint:
+    """Test suite for the token fingerprint scoping the caches."""
+
+    def test_fingerprint_is_stable_and_does_not_contain_token(self):
+        """Test that a token always maps to the same opaque digest."""
+        fingerprint = _credential_fingerprint("ghp_secret")
+
+        assert fingerprint == _credential_fingerprint("ghp_secret")
+        assert "ghp_secret" not in fingerprint
+
+    def test_different_tokens_have_different_fingerprints(self):
+        """Test that two tokens never share cache keys."""
+        assert _credential_fingerprint("token-a") != _credential_fingerprint("token-b")
+
+
+def _blame_range(start, end, sha):
+    """Build a GraphQL blame range for one commit."""
+    return {
+        "startingLine": start,
+        "endingLine": end,
+        "age": 1,
+        "commit": {
+            "oid": sha,
+            "messageHeadline": f"Commit {sha}",
+            "url": f"https://github.com/owner/repo/commit/{sha}",
+            "committedDate": "2024-01-01T00:00:00Z",
+            "associatedPullRequests": {"nodes": []},
+        },
+    }
+
+
+class TestFindBlameRange:
+    """Test suite for locating the blame range covering a line."""
+
+    @pytest.fixture
+    def ranges(self):
+        return [_blame_range(1, 4, "aaa"), _blame_range(5, 5, "bbb"), _blame_range(6, 20, "ccc")]
+
+    @pytest.mark.parametrize("line_number, sha", [(1, "aaa"), (4, "aaa"), (5, "bbb"), (6, "ccc"), (20, "ccc")])
+    def test_finds_range_containing_line(self, ranges, line_number, sha):
+        """Test range starts, ends and single-line ranges."""
+        starts = [r["startingLine"] for r in ranges]
+
+        assert _find_blame_range(ranges, starts, line_number)["commit"]["oid"] == sha
+
+    @pytest.mark.parametrize("line_number", [0, 21, 100])
+    def test_line_outside_ranges_returns_none(self, ranges, line_number):
+        """Test lines before the first and past the last range."""
+        starts = [r["startingLine"] for r in ranges]
+
+        assert _find_blame_range(ranges, starts, line_number) is None
+
+    def test_gap_between_ranges_returns_none(self):
+        """Test a line not covered by any range."""
+        ranges = [_blame_range(1, 3, "aaa"), _blame_range(10, 12, "bbb")]
+
+        assert _find_blame_range(ranges, [1, 10], 7) is None
+
+    def test_empty_ranges_returns_none(self):
+        """Test a file with no blame ranges."""
+        assert _find_blame_range([], [], 1) is None
+
+
+class TestBlameRangesCache:
+    """Test suite for the in-memory blame cache."""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        """Start and finish every test with an empty blame cache."""
+        github_tools._blame_cache.clear()
+        yield
+        github_tools._blame_cache.clear()
+
+    @pytest.fixture
+    def fetches(self, monkeypatch):
+        """Replace the GraphQL blame fetch with a stub recording its calls."""
+        calls = []
+
+        def fake_get_blame_ranges(*args, **kwargs):
+            calls.append(args)
+            return {"head_sha": "head1", "ranges": [_blame_range(1, 10, "aaa")], "combined": True}
+
+        monkeypatch.setattr(github_tools, "_get_blame_ranges", fake_get_blame_ranges)
+        return calls
+
+    @staticmethod
+    def _cached(session):
+        return _get_blame_ranges_cached("https://api.github.com/graphql", session, "owner", "repo", "a.py", "main")
+
+    def test_fresh_entry_is_served_without_fetching(self, fetches):
+        """Test that a second lookup within the TTL does not query GitHub."""
+        session = github_tools._get_session("token-a")
+        first = self._cached(session)
+        second = self._cached(session)
+
+        assert len(fetches) == 1
+        assert second["ranges"][0]["startingLine"] == 1
+        assert second is first
+        assert second["starts"] == (1,)
+
+    def test_cached_blame_is_read_only(self, fetches):
+        """Test that callers cannot corrupt the shared cache entry."""
+        blame = self._cached(github_tools._get_session("token-a"))
+
+        with pytest.raises(TypeError):
+            blame["head_sha"] = "other"
+        with pytest.raises(TypeError):
+            blame["ranges"][0]["commit"]["oid"] = "other"
+        with pytest.raises(AttributeError):
+            blame["ranges"].append(_blame_range(11, 20, "bbb"))
+
+    def test_entries_are_not_shared_between_tokens(self, fetches):
+        """Test that another token's lookup fetches its own blame."""
+        self._cached(github_tools._get_session("token-a"))
+        self._cached(github_tools._get_session("token-b"))
+
+        assert len(fetches) == 2
+
+    def test_blame_for_lines_formats_from_cached_blame(self, fetches):
+        """Test that frozen cached ranges still produce plain result dictionaries."""
+        blame_by_line = _get_graphql_blame_for_lines("token-a", "owner", "repo", "a.py", [3, 42], "main")
+
+        assert list(blame_by_line) == [3]
+        assert blame_by_line[3]["commit"]["sha"] == "aaa"
+        assert blame_by_line[3]["pull_requests"] == []
+
+
+class TestFetchCommit:
+    """Test suite for counting a commit's changed files across pages."""
+
+    @pytest.fixture
+    def pages(self, monkeypatch):
+        """Serve commit pages from a list and record the requested page numbers."""
+        served = {"pages": [], "requested": []}
+
+        def fake_rest_get(token, path, params=None):
+            page = params.get("page", 1)
+            served["requested"].append(page)
+            response = _response(200)
+            response._content = github_tools.json.dumps({"sha": "abc", "files": served["pages"][page - 1]}).encode()
+            if len(served["pages"]) > 1:
+                response.headers["Link"] = (
+                    f'<https://api.github.com{path}?per_page=100&page={len(served["pages"])}>; rel="last"'
+                )
+            return response
+
+        monkeypatch.setattr(github_tools, "_rest_get", fake_rest_get)
+        return served
+
+    def test_single_page_counts_listed_files(self, pages):
+        """Test that a commit without pagination is counted from its own file list."""
+        pages["pages"] = [[{"filename": "a.py"}, {"filename": "b.py"}]]
+
+        commit, total_files = _fetch_commit("token-a", "owner/repo", "abc")
+
+        assert total_files == 2
+        assert commit["files"] == pages["pages"][0]
+        assert pages["requested"] == [1]
+
+    def test_paginated_files_are_counted_from_last_page(self, pages):
+        """Test that only the last page is fetched to count files beyond the first page."""
+        full_page = [{"filename": f"f{i}.py"} for i in range(github_tools._COMMIT_FILES_PER_PAGE)]
+        pages["pages"] = [full_page, full_page, [{"filename": "last.py"}]]
+
+        commit, total_files = _fetch_commit("token-a", "owner/repo", "abc")
+
+        assert total_files == 2 * github_tools._COMMIT_FILES_PER_PAGE + 1
+        assert commit["files"] == full_page
+        assert pages["requested"] == [1, 3]
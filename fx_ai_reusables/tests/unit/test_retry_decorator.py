@@ -0,0 +1,64 @@
+"""
+Unit tests for retry_api_call
+"""
+
+import pytest
+from unittest.mock import patch
+
+from fx_ai_reusables.helpers.retry_decorator import retry_api_call
+
+
+class _RetryAfterError(Exception):
+    """Error carrying a server-requested wait."""
+
+    def __init__(self, retry_after):
+        super().__init__("retry later")
+        self.retry_after = retry_after
+
+
+class TestRetryApiCall:
+    """Test suite for the retry decorator's wait handling."""
+
+    def test_uses_exponential_backoff(self):
+        """Test that plain failures wait delay, then delay * backoff."""
+        calls = []
+
+        @retry_api_call(max_retries=3, delay=1.0, backoff=2.0, verbose=False)
+        def flaky():
+            calls.append(1)
+            raise ValueError("boom")
+
+        with patch("fx_ai_reusables.helpers.retry_decorator.time.sleep") as sleep:
+            with pytest.raises(ValueError):
+                flaky()
+
+        assert len(calls) == 3
+        assert [c.args[0] for c in sleep.call_args_list] == [1.0, 2.0]
+
+    def test_honors_retry_after(self):
+        """Test that an exception's retry_after replaces the backoff delay."""
+        attempts = iter([_RetryAfterError(7.0), None])
+
+        @retry_api_call(max_retries=3, delay=1.0, verbose=False)
+        def rate_limited():
+            error = next(attempts)
+            if error:
+                raise error
+            return "ok"
+
+        with patch("fx_ai_reusables.helpers.retry_decorator.time.sleep") as sleep:
+            assert rate_limited() == "ok"
+
+        sleep.assert_called_once_with(7.0)
+
+    def test_gives_up_when_total_delay_would_exceed_cap(self):
+        """Test that a wait beyond max_total_delay raises without sleeping."""
+        @retry_api_call(max_retries=3, delay=1.0, verbose=False, max_total_delay=60)
+        def rate_limited():
+            raise _RetryAfterError(3600.0)
+
+        with patch("fx_ai_reusables.helpers.retry_decorator.time.sleep") as sleep:
+            with pytest.raises(_RetryAfterError):
+                rate_limited()
+
+        sleep.assert_not_called()
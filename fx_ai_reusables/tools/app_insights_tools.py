@@ -1,53 +1,325 @@
 import asyncio
-from datetime import datetime, timedelta
+import atexit
+from collections import deque, namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, wraps
+from itertools import islice
+from operator import gt, itemgetter, lt
 import json
+import re
+import threading
+import time
+import aiohttp
 from langchain_core.tools import StructuredTool
-from typing import Dict, Any, List, Optional, Union
-from azure.monitor.query import LogsQueryClient, LogsQueryStatus, MetricsQueryClient
-from azure.identity import ClientSecretCredential, DefaultAzureCredential
+from typing import Dict, Any, List, Optional, Tuple, Union
+from azure.monitor.query import LogsQueryStatus, MetricsQueryClient
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.monitor.query.aio import LogsQueryClient as AsyncLogsQueryClient
+from azure.identity.aio import (
+    ClientSecretCredential as AsyncClientSecretCredential,
+    DefaultAzureCredential as AsyncDefaultAzureCredential
+)
 from fx_ai_reusables.secrets.interfaces.secret_retriever_interface import ISecretRetriever
 
 
+# Enum members are singletons, so status checks can use an identity test against a module-level binding
+_SUCCESS = LogsQueryStatus.SUCCESS
+
+# How long fetched Azure secrets are reused before going back to the secret store
+_SECRET_CACHE_TTL_SECONDS = 300
+
+
+# Async clients hold an aiohttp session bound to the loop that first used them, so they are only
+# created on the module's background loop (see _on_background_loop): one transport shared by every
+# identity, and a (client, credential) pair per identity
+_LoopClients = namedtuple("_LoopClients", ("transport", "clients"))
+_async_logs_clients: Dict[asyncio.AbstractEventLoop, _LoopClients] = {}
+_async_logs_clients_lock = threading.Lock()
+
+# Event loop shared by every sync_wrapper in this module, started on first use
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def _get_background_loop() -> asyncio.AbstractEventLoop:
+    """Return the module's background event loop, starting its daemon thread on first use."""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="app-insights-tools-loop", daemon=True).start()
+            _background_loop = loop
+    return _background_loop
+
+
 def _run_async(coroutine):
-    """Helper to run async function in sync context."""
+    """Helper to run async function in sync context.
+
+    The coroutine is scheduled on one persistent background loop, so sync callers neither create and
+    tear down a loop per call nor trip over a loop that is already running in their own thread. Every
+    query in this module goes through the async client, so the shared loop is never blocked by I/O.
+    """
+    loop = _get_background_loop()
+    if _on_loop_thread(loop):
+        # Blocking on .result() here would wait on the very loop that has to run the coroutine
+        coroutine.close()
+        raise RuntimeError("Sync app insights tools cannot be called from the tools' own event loop; "
+                           "await the tool's coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+def _on_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    """Check whether the calling thread is the one running `loop`."""
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            raise RuntimeError("Cannot run async function in already running event loop")
-        return loop.run_until_complete(coroutine)
+        return asyncio.get_running_loop() is loop
     except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(coroutine)
-        finally:
-            loop.close()
+        return False
+
 
+def _on_background_loop(coroutine_function):
+    """Make a tool coroutine run on the module's background loop, whichever loop awaits it.
+
+    The cached async clients are bound to the loop that created them; keeping every query on the
+    background loop means they are created once, reused by sync and async callers alike, and closed
+    at exit instead of leaking with short-lived caller loops.
+    """
+    @wraps(coroutine_function)
+    async def run(*args, **kwargs):
+        loop = _get_background_loop()
+        if _on_loop_thread(loop):
+            return await coroutine_function(*args, **kwargs)
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coroutine_function(*args, **kwargs), loop)
+        )
 
-def _get_credential(tenant_id: Optional[str], client_id: Optional[str], client_secret: Optional[str]):
-    """Helper to get Azure credential."""
+    return run
+
+
+def _cached_azure_secrets(secret_retriever: ISecretRetriever):
+    """Return a coroutine function yielding (tenant_id, client_id, client_secret, resource_id).
+
+    The four secrets are fetched concurrently and reused for _SECRET_CACHE_TTL_SECONDS, so repeated
+    tool calls do not pay a secret store round-trip each.
+    """
+    cache = {"values": None, "expires_at": 0.0}
+
+    async def get_secrets():
+        if cache["values"] is not None and time.time() < cache["expires_at"]:
+            return cache["values"]
+        cache["values"] = tuple(await asyncio.gather(
+            secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID"),
+            secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID"),
+            secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET"),
+            secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
+        ))
+        cache["expires_at"] = time.time() + _SECRET_CACHE_TTL_SECONDS
+        return cache["values"]
+
+    return get_secrets
+
+
+def _get_async_credential(tenant_id: Optional[str], client_id: Optional[str], client_secret: Optional[str]):
+    """Helper to get async Azure credential."""
     if client_id and client_secret and tenant_id:
-        return ClientSecretCredential(
+        return AsyncClientSecretCredential(
             tenant_id=tenant_id,
             client_id=client_id,
             client_secret=client_secret
         )
     else:
-        return DefaultAzureCredential()
+        return AsyncDefaultAzureCredential()
+
+
+def _get_logs_client(
+    tenant_id: Optional[str], client_id: Optional[str], client_secret: Optional[str]
+) -> AsyncLogsQueryClient:
+    """Return the async LogsQueryClient for the given identity on the background event loop.
+
+    The client and its credential are reused by later calls, keeping the token cache and connection
+    pool warm. Callers must run on the background loop (see _on_background_loop), so no client is
+    ever bound to a loop that could close before the clients are.
+    """
+    loop = asyncio.get_running_loop()
+    if loop is not _background_loop:
+        raise RuntimeError("App Insights logs clients are only created on the tools' background loop")
+    key = (tenant_id, client_id, client_secret)
+    with _async_logs_clients_lock:
+        loop_clients = _async_logs_clients.get(loop)
+        if loop_clients is None:
+            # One pooled session per loop, so connections and DNS lookups are shared by every client on it
+            session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300))
+            loop_clients = _async_logs_clients[loop] = _LoopClients(
+                transport=AioHttpTransport(session=session, session_owner=False), clients={}
+            )
+        if key not in loop_clients.clients:
+            credential = _get_async_credential(tenant_id, client_id, client_secret)
+            loop_clients.clients[key] = (
+                AsyncLogsQueryClient(credential=credential, transport=loop_clients.transport), credential
+            )
+        return loop_clients.clients[key][0]
+
+
+async def _close_loop_clients(loop_clients: _LoopClients) -> None:
+    """Close the clients and credentials cached for one loop, then their shared session."""
+    await asyncio.gather(
+        *(closable.close() for pair in loop_clients.clients.values() for closable in pair),
+        return_exceptions=True
+    )
+    await loop_clients.transport.session.close()
+
+
+@atexit.register
+def _close_background_clients() -> None:
+    """Close the clients cached on the background loop before the interpreter exits.
+
+    Clients are only ever created on the background loop, so this closes all of them.
+    """
+    with _async_logs_clients_lock:
+        loop_clients = _async_logs_clients.pop(_background_loop, None) if _background_loop else None
+    if loop_clients is not None and not _background_loop.is_closed():
+        try:
+            asyncio.run_coroutine_threadsafe(_close_loop_clients(loop_clients), _background_loop).result(timeout=5)
+        except Exception:
+            pass
 
 
 def _format_datetime(dt):
     """Helper to format datetime objects for JSON serialization."""
     if isinstance(dt, datetime):
-        return dt.isoformat()
+        return _isoformat(dt)
     return dt
 
 
+def _format_series_timestamp(value):
+    """Format one element of a make-series timestamp array like a datetime column.
+
+    Series arrays are `dynamic`, so their timestamps arrive as service-formatted strings (e.g.
+    "2024-01-15T10:45:00.0000000Z") rather than datetimes; they are parsed and re-rendered with
+    isoformat so they match every other timestamp the tools return.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return _format_datetime(value)
+
+
+@lru_cache(maxsize=4096)
+def _isoformat(dt: datetime) -> str:
+    """Cached isoformat; bucketed timestamps repeat across the tables of one analysis."""
+    return dt.isoformat()
+
+
+@lru_cache(maxsize=1024)
 def _col_name(col) -> str:
     """Return the column name, whether `col` has a `name` attribute or is a string-like object."""
     return getattr(col, 'name', str(col))
 
 
+def _kql_string(value: Optional[str]) -> str:
+    """Render `value` as an escaped KQL string literal."""
+    value = "" if value is None else str(value)
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\r", "\\r")
+    return f"'{escaped}'"
+
+
+def _kql_bind(query: str, **values: Union[str, int, float, None]) -> str:
+    """Prepend `let` bindings for `values`, so the query body stays constant and user input only
+    ever reaches the query as escaped string literals. Numbers are bound as numeric literals."""
+    prelude = "".join(
+        f"let {name} = {value!r};\n" if isinstance(value, (int, float)) and not isinstance(value, bool)
+        else f"let {name} = {_kql_string(value)};\n"
+        for name, value in values.items()
+    )
+    return prelude + query
+
+
+def _index_cols(table, names) -> Dict[str, int]:
+    """Map the requested column names to their positions in `table`, skipping any that are absent."""
+    cols = [_col_name(col) for col in table.columns]
+    return {name: cols.index(name) for name in names if name in cols}
+
+
+def _rows_as(table, *fields):
+    """Yield a tuple of the named fields for each row in `table`, in the order given.
+
+    Column positions are resolved once and the fields are pulled with a single itemgetter call per
+    row, so no per-row dict is built. Fields missing from the table (e.g. a `union isfuzzy=true` over
+    an absent table) come back as None.
+    """
+    index = _index_cols(table, fields)
+    if len(index) < len(fields):
+        positions = [index.get(field) for field in fields]
+        return (tuple(None if i is None else row[i] for i in positions) for row in table.rows)
+    getter = itemgetter(*(index[field] for field in fields))
+    if len(fields) == 1:
+        return ((getter(row),) for row in table.rows)
+    return map(getter, table.rows)
+
+
+def _parse_dynamic(value):
+    """Helper to decode `dynamic` columns, which the service may return as JSON strings."""
+    if isinstance(value, str):
+        return json.loads(value)
+    return value if value is not None else []
+
+
+def _column_types(table) -> List[Optional[str]]:
+    """Return the KQL type of each column in `table`, or None where the SDK does not expose it."""
+    types = getattr(table, "columns_types", None)
+    if types:
+        return list(types)
+    return [getattr(col, "type", None) for col in table.columns]
+
+
+@lru_cache(maxsize=256)
+def _row_converter(column_names: Tuple[str, ...], column_types: Tuple[Optional[str], ...]):
+    """Compile a function turning one row of a table with this schema into a JSON-ready dict.
+
+    Only datetime columns, or columns whose type is unknown, go through `_format_datetime`; values
+    of every other type are copied as is. Converters are cached per schema.
+    """
+    fields = [
+        f"{name!r}: row[{i}]" if kql_type and kql_type != "datetime" else f"{name!r}: _format_datetime(row[{i}])"
+        for i, (name, kql_type) in enumerate(zip(column_names, column_types))
+    ]
+    namespace = {"_format_datetime": _format_datetime}
+    exec(f"def convert(row):\n    return {{{', '.join(fields)}}}\n", namespace)
+    return namespace["convert"]
+
+
+def _parse_timespan(start_date: str, end_date: str) -> Tuple[datetime, datetime]:
+    """Parse ISO 8601 bounds into a (start, end) tuple for the `timespan` argument of query_resource.
+
+    Bounds without an offset are taken as UTC.
+    """
+    def parse(value: str) -> datetime:
+        parsed = datetime.fromisoformat(value)
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+    return parse(start_date), parse(end_date)
+
+
+async def _query_resource_concurrently(
+    logs_client: AsyncLogsQueryClient,
+    resource_id: str,
+    *queries: str,
+    timespan: Optional[Tuple[datetime, datetime]] = None
+) -> List[Any]:
+    """Run several independent queries against one resource concurrently.
+
+    `LogsBatchQuery` only addresses workspaces, so resource-scoped queries cannot share a single
+    `query_batch` request. The async client's requests are gathered instead, so the round-trips
+    overlap and the results come back in the order given. The optional `timespan` scopes every
+    query server-side.
+    """
+    return await asyncio.gather(*(
+        logs_client.query_resource(resource_id, query, timespan=timespan)
+        for query in queries
+    ))
+
+
 def create_get_app_insights_operation_id_using_url_tool(secret_retriever: ISecretRetriever):
     """Factory function to create app insights operation ID tool with injected secret retriever.
     
@@ -61,6 +333,7 @@ def create_get_app_insights_operation_id_using_url_tool(secret_retriever: ISecre
     Returns:
         Configured tool instance that the LLM can call with (requesturl, start_date, end_date)
     """
+    @_on_background_loop
     async def get_app_insights_operation_id_using_url(requesturl: str, start_date: str, end_date: str) -> list:
         """Retrieve Azure Application Insights operation IDs for failed requests matching a specific URL.
         
@@ -106,23 +379,8 @@ def create_get_app_insights_operation_id_using_url_tool(secret_retriever: ISecre
         client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
         client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
         
-        if client_id and client_secret and tenant_id:
-            # Use Service Principal authentication
-            from azure.identity import ClientSecretCredential
-            credential = ClientSecretCredential(
-                tenant_id=tenant_id,
-                client_id=client_id,
-                client_secret=client_secret
-            )
-        else:
-            # Use Default Azure credentials
-            from azure.identity import DefaultAzureCredential
-            credential = DefaultAzureCredential()
-
-
         # Initialize logs client
-        
-        logs_client = LogsQueryClient(credential=credential)
+        logs_client = _get_logs_client(tenant_id, client_id, client_secret)
         resource_id = await secret_retriever.retrieve_optional_secret_value("AZURE_APP_RESOURCE")
         
         # Prepare KQL query
@@ -141,13 +399,13 @@ def create_get_app_insights_operation_id_using_url_tool(secret_retriever: ISecre
 
 
         try:
-            response = logs_client.query_resource(resource_id, query, timespan=None)
+            response = await logs_client.query_resource(resource_id, query, timespan=None)
 
 
             # Process results
 
 
-            if response.status == LogsQueryStatus.SUCCESS:
+            if response.status is _SUCCESS:
                 # Process query results
                 
                 results = []
@@ -206,6 +464,7 @@ def create_get_app_insights_logs_using_operation_id_tool(secret_retriever: ISecr
     Returns:
         Configured tool instance that the LLM can call with (operation_id, start_date, end_date)
     """
+    @_on_background_loop
     async def get_app_insights_logs_using_operation_id(operation_id: str, start_date: str, end_date: str):
         """Retrieve comprehensive log data from Azure Application Insights using an operation ID.
         
@@ -309,22 +568,8 @@ def create_get_app_insights_logs_using_operation_id_tool(secret_retriever: ISecr
         client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
         client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
         
-        if client_id and client_secret and tenant_id:
-            # Use Service Principal authentication
-            from azure.identity import ClientSecretCredential
-            credential = ClientSecretCredential(
-                tenant_id=tenant_id,
-                client_id=client_id,
-                client_secret=client_secret
-            )
-        else:
-            # Use Default Azure credentials
-            from azure.identity import DefaultAzureCredential
-            credential = DefaultAzureCredential()
-
-
         # Initialize logs client
-        logs_client = LogsQueryClient(credential=credential)
+        logs_client = _get_logs_client(tenant_id, client_id, client_secret)
         resource_id = await secret_retriever.retrieve_optional_secret_value("AZURE_APP_RESOURCE")
         
         # Prepare comprehensive query
@@ -342,40 +587,17 @@ def create_get_app_insights_logs_using_operation_id_tool(secret_retriever: ISecr
 
 
         try:
-            response = logs_client.query_resource(resource_id, query, timespan=None)
+            response = await logs_client.query_resource(resource_id, query, timespan=None)
 
 
             # Process comprehensive results
 
 
-            if response.status == LogsQueryStatus.SUCCESS:
+            if response.status is _SUCCESS:
                 # Process telemetry data
-                
-                results = []
-                telemetry_counts = {"requests": 0, "exceptions": 0, "customEvents": 0, "availabilityResults": 0}
-                
-                for table in response.tables:
-                    for row in table.rows:
-                        log_entry = dict(zip(table.columns, row))
-                        results.append(log_entry)
-                        
-                        # Count telemetry types for detailed analysis
-                        if "itemType" in log_entry:
-                            item_type = log_entry.get("itemType", "unknown")
-                            if item_type in telemetry_counts:
-                                telemetry_counts[item_type] += 1
-                
-                # Analyze log patterns
-                
-                # Analyze error patterns
-                error_count = sum(1 for entry in results if "exception" in str(entry).lower() or "error" in str(entry).lower())
-                
-                # Correlate timeline
-                
-                # Prepare analysis summary
-                
-                # Success with comprehensive details
-                telemetry_summary = ", ".join([f"{count} {type_name}" for type_name, count in telemetry_counts.items() if count > 0])
+                results = [dict(zip(table.columns, row)) for table in response.tables for row in table.rows]
+
+                # Success with comprehensive details; results are serialized once, downstream
                 return results
 
 
@@ -405,6 +627,7 @@ def create_get_app_insights_logs_using_operation_id_tool(secret_retriever: ISecr
 def create_search_requests_by_criteria_tool(secret_retriever: ISecretRetriever):
     """Factory function to create flexible request search tool with injected secret retriever."""
     
+    @_on_background_loop
     async def search_requests_by_criteria(
         url_pattern: Optional[str] = None,
         status_code: Optional[int] = None,
@@ -484,8 +707,7 @@ def create_search_requests_by_criteria_tool(secret_retriever: ISecretRetriever):
             client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
             resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
             
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time range
             if not start_date:
@@ -521,9 +743,9 @@ def create_search_requests_by_criteria_tool(secret_retriever: ISecretRetriever):
             query = "\n".join(query_parts)
             
             # Execute query
-            response = logs_client.query_resource(resource_id, query, timespan=None)
+            response = await logs_client.query_resource(resource_id, query, timespan=None)
             
-            if response.status == LogsQueryStatus.SUCCESS:
+            if response.status is _SUCCESS:
                 requests = []
                 status_code_breakdown = {}
                 total_duration = 0
@@ -629,6 +851,7 @@ def create_search_requests_by_criteria_tool(secret_retriever: ISecretRetriever):
 def create_get_failure_summary_by_timerange_tool(secret_retriever: ISecretRetriever):
     """Factory function to create failure summary tool with injected secret retriever."""
     
+    @_on_background_loop
     async def get_failure_summary_by_timerange(
         start_date: str = None,
         end_date: str = None,
@@ -689,8 +912,7 @@ def create_get_failure_summary_by_timerange_tool(secret_retriever: ISecretRetrie
             client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
             resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
             
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time range
             if not start_date:
@@ -742,10 +964,10 @@ def create_get_failure_summary_by_timerange_tool(secret_retriever: ISecretRetrie
             """
             
             # Execute queries
-            summary_response = logs_client.query_resource(resource_id, summary_query, timespan=None)
-            timeline_response = logs_client.query_resource(resource_id, timeline_query, timespan=None)
+            summary_response = await logs_client.query_resource(resource_id, summary_query, timespan=None)
+            timeline_response = await logs_client.query_resource(resource_id, timeline_query, timespan=None)
             
-            if summary_response.status == LogsQueryStatus.SUCCESS and timeline_response.status == LogsQueryStatus.SUCCESS:
+            if summary_response.status is _SUCCESS and timeline_response.status is _SUCCESS:
                 # Process summary results
                 top_failures = []
                 total_failures = 0
@@ -784,9 +1006,9 @@ def create_get_failure_summary_by_timerange_tool(secret_retriever: ISecretRetrie
                 | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
                 | count
                 """
-                total_response = logs_client.query_resource(resource_id, total_requests_query, timespan=None)
+                total_response = await logs_client.query_resource(resource_id, total_requests_query, timespan=None)
                 total_requests = 0
-                if total_response.status == LogsQueryStatus.SUCCESS:
+                if total_response.status is _SUCCESS:
                     for table in total_response.tables:
                         if table.rows:
                             total_requests = table.rows[0][0]
@@ -844,6 +1066,7 @@ def create_get_failure_summary_by_timerange_tool(secret_retriever: ISecretRetrie
 def create_trace_distributed_transaction_tool(secret_retriever: ISecretRetriever):
     """Factory function to create distributed transaction tracing tool with injected secret retriever."""
     
+    @_on_background_loop
     async def trace_distributed_transaction(
         operation_id: str,
         include_performance_details: bool = True
@@ -943,8 +1166,7 @@ def create_trace_distributed_transaction_tool(secret_retriever: ISecretRetriever
             client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
             resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
             
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Get all telemetry for this operation
             telemetry_query = f"""
@@ -972,9 +1194,9 @@ def create_trace_distributed_transaction_tool(secret_retriever: ISecretRetriever
             | order by timestamp asc
             """
             
-            response = logs_client.query_resource(resource_id, telemetry_query, timespan=None)
+            response = await logs_client.query_resource(resource_id, telemetry_query, timespan=None)
             
-            if response.status == LogsQueryStatus.SUCCESS:
+            if response.status is _SUCCESS:
                 # Process results
                 root_request = None
                 service_calls = []
@@ -1136,9 +1358,57 @@ def create_trace_distributed_transaction_tool(secret_retriever: ISecretRetriever
     return tool
 
 
+# Dependency failures grouped by type and target
+_DEPENDENCY_ANALYSIS_QUERY = """
+dependencies
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(dep_type) or type == dep_type
+| summarize
+    total_calls = count(),
+    failure_count = countif(success == false),
+    avg_duration = avg(duration),
+    avg_duration_failed = avgif(duration, success == false),
+    sample_operations = make_set(operation_Id, 5),
+    affected_operations = make_set(name, 10),
+    status_codes = make_bag(pack(tostring(resultCode), 1))
+by type, target
+| where failure_count >= min_failure_count
+| extend failure_rate = round(failure_count * 100.0 / total_calls, 1)
+| order by failure_count desc
+"""
+
+
+# Failed dependency calls per 15 minutes, for trend analysis
+_DEPENDENCY_TIMELINE_QUERY = """
+dependencies
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(dep_type) or type == dep_type
+| where success == false
+| summarize failures = count() by type, target, bin(timestamp, 15m)
+| order by timestamp asc
+"""
+
+
+# Top error messages per failing dependency
+_DEPENDENCY_ERROR_QUERY = """
+dependencies
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(dep_type) or type == dep_type
+| where success == false
+| extend error_message = tostring(customDimensions["Error.Message"])
+| where isnotempty(error_message)
+| summarize error_count = count() by type, target, error_message
+| top-nested of type by sum(error_count),
+  top-nested of target by sum(error_count),
+  top-nested 5 of error_message by error_count = sum(error_count)
+"""
+
+
 def create_analyze_dependency_failures_tool(secret_retriever: ISecretRetriever):
     """Factory function to create dependency failure analysis tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def analyze_dependency_failures(
         service_name: Optional[str] = None,
         dependency_type: Optional[str] = None,
@@ -1220,145 +1490,120 @@ def create_analyze_dependency_failures_tool(secret_retriever: ISecretRetriever):
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time range
+            now = datetime.now(timezone.utc)
             if not start_date:
-                start_date = (datetime.utcnow() - timedelta(hours=1)).isoformat() + "Z"
+                start_date = (now - timedelta(hours=1)).isoformat().replace("+00:00", "Z")
             if not end_date:
-                end_date = datetime.utcnow().isoformat() + "Z"
-            
-            # Build query filters
-            filters = [f"timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')"]
-            if service_name:
-                filters.append(f"cloud_RoleName == '{service_name}'")
-            if dependency_type:
-                filters.append(f"type == '{dependency_type}'")
-            
-            where_clause = " and ".join(filters)
-            
-            # Main dependency analysis query
-            analysis_query = f"""
-            dependencies
-            | where {where_clause}
-            | summarize 
-                total_calls = count(),
-                failure_count = countif(success == false),
-                avg_duration = avg(duration),
-                avg_duration_failed = avgif(duration, success == false),
-                sample_operations = make_set(operation_Id, 5),
-                affected_operations = make_set(name, 10),
-                status_codes = make_bag(pack(tostring(resultCode), 1))
-            by type, target
-            | where failure_count >= {min_failure_count}
-            | extend failure_rate = round(failure_count * 100.0 / total_calls, 1)
-            | order by failure_count desc
-            """
+                end_date = now.isoformat().replace("+00:00", "Z")
             
-            # Timeline query for trend analysis
-            timeline_query = f"""
-            dependencies  
-            | where {where_clause}
-            | where success == false
-            | summarize failures = count() by type, target, bin(timestamp, 15m)
-            | order by timestamp asc
-            """
-            
-            # Error message analysis
-            error_query = f"""
-            dependencies
-            | where {where_clause}
-            | where success == false
-            | extend error_message = tostring(customDimensions["Error.Message"])
-            | where isnotempty(error_message)
-            | summarize error_count = count() by type, target, error_message
-            | top-nested of type by sum(error_count),
-              top-nested of target by sum(error_count),
-              top-nested 5 of error_message by sum(error_count)
-            """
+            # Bind filters and the failure threshold ahead of each query body; the time range
+            # is applied server-side through `timespan`
+            bindings = {"svc": service_name, "dep_type": dependency_type, "min_failure_count": min_failure_count}
             
             # Execute queries
-            analysis_response = logs_client.query_resource(resource_id, analysis_query, timespan=None)
-            timeline_response = logs_client.query_resource(resource_id, timeline_query, timespan=None)
-            error_response = logs_client.query_resource(resource_id, error_query, timespan=None)
+            analysis_response, timeline_response, error_response = await _query_resource_concurrently(
+                logs_client, resource_id,
+                *(_kql_bind(query, **bindings)
+                  for query in (_DEPENDENCY_ANALYSIS_QUERY, _DEPENDENCY_TIMELINE_QUERY, _DEPENDENCY_ERROR_QUERY)),
+                timespan=_parse_timespan(start_date, end_date)
+            )
             
-            if analysis_response.status == LogsQueryStatus.SUCCESS:
+            if analysis_response.status is _SUCCESS:
                 # Process main analysis results
                 failed_dependencies = []
                 total_calls = 0
                 total_failures = 0
                 
                 for table in analysis_response.tables:
+                    idx = _index_cols(table, (
+                        "type", "target", "total_calls", "failure_count", "failure_rate", "avg_duration",
+                        "avg_duration_failed", "affected_operations", "sample_operations", "status_codes"
+                    ))
+                    type_i, target_i = idx["type"], idx["target"]
+                    calls_i, failures_i, rate_i = idx["total_calls"], idx["failure_count"], idx["failure_rate"]
+                    duration_i, failed_duration_i = idx["avg_duration"], idx["avg_duration_failed"]
+                    operations_i, samples_i, codes_i = idx["affected_operations"], idx["sample_operations"], idx["status_codes"]
                     for row in table.rows:
-                        dep = dict(zip([_col_name(col) for col in table.columns], row))
-                        total_calls += dep.get("total_calls", 0)
-                        total_failures += dep.get("failure_count", 0)
+                        calls = row[calls_i] or 0
+                        failures = row[failures_i] or 0
+                        total_calls += calls
+                        total_failures += failures
                         
                         failed_dependencies.append({
-                            "type": dep.get("type"),
-                            "target": dep.get("target"),
-                            "failure_count": dep.get("failure_count"),
-                            "total_calls": dep.get("total_calls"),
-                            "failure_rate": dep.get("failure_rate"),
-                            "avg_duration_ms": round(dep.get("avg_duration", 0)),
-                            "avg_duration_before_failure": round(dep.get("avg_duration_failed", 0)),
-                            "affected_operations": dep.get("affected_operations", []),
-                            "sample_operation_ids": dep.get("sample_operations", []),
-                            "status_codes": dep.get("status_codes", {})
+                            "type": row[type_i],
+                            "target": row[target_i],
+                            "failure_count": failures,
+                            "total_calls": calls,
+                            "failure_rate": row[rate_i],
+                            "avg_duration_ms": round(row[duration_i] or 0),
+                            "avg_duration_before_failure": round(row[failed_duration_i] or 0),
+                            "affected_operations": row[operations_i] or [],
+                            "sample_operation_ids": row[samples_i] or [],
+                            "status_codes": row[codes_i] or {}
                         })
                 
-                # Process timeline for trends
-                timeline = {}
-                if timeline_response.status == LogsQueryStatus.SUCCESS:
+                # Process timeline for trends, keeping a running failure total and the
+                # three most recent buckets per (type, target)
+                timeline_points = {}
+                timeline_totals = {}
+                timeline_recent = {}
+                if timeline_response.status is _SUCCESS:
                     for table in timeline_response.tables:
+                        idx = _index_cols(table, ("type", "target", "timestamp", "failures"))
+                        type_i, target_i, ts_i, failures_i = idx["type"], idx["target"], idx["timestamp"], idx["failures"]
                         for row in table.rows:
-                            timeline_item = dict(zip([_col_name(col) for col in table.columns], row))
-                            key = f"{timeline_item['type']}|{timeline_item['target']}"
-                            if key not in timeline:
-                                timeline[key] = []
-                            timeline[key].append({
-                                "timestamp": _format_datetime(timeline_item["timestamp"]),
-                                "failures": timeline_item["failures"]
+                            key = (row[type_i], row[target_i])
+                            if key not in timeline_points:
+                                timeline_points[key] = []
+                                timeline_totals[key] = 0
+                                timeline_recent[key] = deque(maxlen=3)
+                            failures = row[failures_i]
+                            timeline_points[key].append({
+                                "timestamp": _format_datetime(row[ts_i]),
+                                "failures": failures
                             })
+                            timeline_totals[key] += failures
+                            timeline_recent[key].append(failures)
                 
                 # Process error messages
                 error_patterns = {}
-                if error_response.status == LogsQueryStatus.SUCCESS:
+                if error_response.status is _SUCCESS:
                     for table in error_response.tables:
+                        idx = _index_cols(table, ("type", "target", "error_message", "error_count"))
+                        type_i, target_i, message_i, count_i = idx["type"], idx["target"], idx["error_message"], idx["error_count"]
                         for row in table.rows:
-                            error_item = dict(zip([_col_name(col) for col in table.columns], row))
-                            key = f"{error_item.get('type')}|{error_item.get('target')}"
+                            key = (row[type_i], row[target_i])
                             if key not in error_patterns:
                                 error_patterns[key] = []
-                            if error_item.get("error_message"):
+                            if row[message_i]:
                                 error_patterns[key].append({
-                                    "error": error_item["error_message"],
-                                    "count": error_item.get("error_count", 0)
+                                    "error": row[message_i],
+                                    "count": row[count_i] or 0
                                 })
                 
-                # Add error patterns to dependencies
+                # Add error patterns, trends and recommendations in one pass over dependencies
+                recommendations = []
                 for dep in failed_dependencies:
-                    key = f"{dep['type']}|{dep['target']}"
+                    key = (dep["type"], dep["target"])
                     dep["common_errors"] = error_patterns.get(key, [])
                     
-                    # Determine trend
-                    if key in timeline and len(timeline[key]) > 1:
-                        recent_avg = sum(t["failures"] for t in timeline[key][-3:]) / min(3, len(timeline[key]))
-                        older_avg = sum(t["failures"] for t in timeline[key][:-3]) / max(1, len(timeline[key]) - 3)
+                    # Determine trend from the recent window and the running total
+                    points = timeline_points.get(key)
+                    if points and len(points) > 1:
+                        recent = timeline_recent[key]
+                        recent_sum = sum(recent)
+                        recent_avg = recent_sum / len(recent)
+                        older_avg = (timeline_totals[key] - recent_sum) / max(1, len(points) - len(recent))
                         dep["trend"] = "increasing" if recent_avg > older_avg * 1.5 else "stable"
-                
-                # Generate recommendations
-                recommendations = []
-                for dep in failed_dependencies:
+                    
+                    # Generate recommendations
                     if dep["type"] == "SQL" and dep["avg_duration_before_failure"] > 25000:
                         recommendations.append(f"SQL timeout issues with {dep['target']} - check query performance and connection pool")
-                    elif dep["type"] == "HTTP" and "503" in str(dep.get("status_codes", {})):
+                    elif dep["type"] == "HTTP" and "503" in str(dep["status_codes"]):
                         recommendations.append(f"External service {dep['target']} returning 503 - service may be down")
                     elif dep["failure_rate"] > 20:
                         recommendations.append(f"High failure rate ({dep['failure_rate']}%) for {dep['target']}")
@@ -1371,7 +1616,7 @@ def create_analyze_dependency_failures_tool(secret_retriever: ISecretRetriever):
                         "affected_dependencies": len(failed_dependencies)
                     },
                     "failed_dependencies": failed_dependencies,
-                    "timeline": timeline,
+                    "timeline": {f"{dep_type}|{target}": points for (dep_type, target), points in timeline_points.items()},
                     "recommendations": recommendations,
                     "filters": {
                         "service_name": service_name,
@@ -1414,9 +1659,60 @@ def create_analyze_dependency_failures_tool(secret_retriever: ISecretRetriever):
     return tool
 
 
+# Per-minute error and metric series correlated server-side; returns one error summary row
+# (first 20 timeline points plus totals) and one row per metric
+_ERROR_METRIC_CORRELATION_QUERY = """
+let t0 = todatetime(start_time);
+let t1 = todatetime(end_time);
+let minute_stats = materialize(requests
+| where isempty(svc) or cloud_RoleName == svc
+| summarize
+    failed_requests = countif(success == false),
+    error_rate = round(countif(success == false) * 100.0 / count(), 1),
+    avg_duration = avg(duration)
+by timestamp = bin(timestamp, 1m));
+let errors = materialize(minute_stats
+| make-series failed_requests = sum(failed_requests), error_rate = avg(error_rate), avg_duration = avg(avg_duration)
+    default = 0 on timestamp from bin(t0, 1m) to t1 step 1m);
+let error_series = toscalar(errors | project error_rate);
+let avg_error_rate = toscalar(minute_stats | summarize round(avg(error_rate), 1));
+let metrics = union
+    (performanceCounters
+    | where isempty(svc) or cloud_RoleName == svc
+    | where name in ("% Processor Time", "Available Bytes", "Request rate", "Requests per Second")
+    | make-series metric_series = avg(value) default = 0 on timestamp from bin(t0, 1m) to t1 step 1m by metric = name
+    | project metric, metric_series),
+    (errors | project metric = "response_time_ms", metric_series = avg_duration);
+union
+    (errors
+    | extend peak = series_stats_dynamic(error_rate)
+    | project
+        timestamps = array_slice(timestamp, 0, 19),
+        error_rates = array_slice(error_rate, 0, 19),
+        failed_counts = array_slice(failed_requests, 0, 19),
+        total_errors = array_sum(failed_requests),
+        avg_error_rate = avg_error_rate,
+        peak_error_rate = todouble(peak.max),
+        peak_error_time = iff(todouble(peak.max) > 0, todatetime(timestamp[toint(peak.max_idx)]), datetime(null))),
+    (metrics
+    | extend correlation = series_pearson_correlation(error_series, metric_series)
+    | extend
+        correlation = iff(isfinite(correlation), correlation, 0.0),
+        peak_value = todouble(series_stats_dynamic(metric_series).max),
+        normal_value = todouble(series_stats_dynamic(array_slice(metric_series, 0, 9)).avg),
+        error_rates = error_series
+    | mv-apply value = metric_series to typeof(double), rate = error_rates to typeof(double) on (
+        summarize breach_count = countif(value > 80 and rate > 10)
+    )
+    | project metric, correlation, peak_value, normal_value, breach_count)
+"""
+
+
 def create_correlate_errors_and_metrics_tool(secret_retriever: ISecretRetriever):
     """Factory function to create error and metrics correlation tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def correlate_errors_and_metrics(
         service_name: Optional[str] = None,
         start_date: str = None,
@@ -1501,192 +1797,121 @@ def create_correlate_errors_and_metrics_tool(secret_retriever: ISecretRetriever)
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time range (2 hours for better correlation)
+            now = datetime.now(timezone.utc)
             if not start_date:
-                start_date = (datetime.utcnow() - timedelta(hours=2)).isoformat() + "Z"
+                start_date = (now - timedelta(hours=2)).isoformat().replace("+00:00", "Z")
             if not end_date:
-                end_date = datetime.utcnow().isoformat() + "Z"
+                end_date = now.isoformat().replace("+00:00", "Z")
             
             # Default metrics to check
             if not metrics_to_check:
                 metrics_to_check = ["cpu", "memory", "response_time", "request_rate"]
             
-            # Build service filter
-            service_filter = f"| where cloud_RoleName == '{service_name}'" if service_name else ""
-            
-            # Query for error timeline
-            error_timeline_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | summarize 
-                total_requests = count(),
-                failed_requests = countif(success == false),
-                error_rate = round(countif(success == false) * 100.0 / count(), 1)
-            by bin(timestamp, 1m)
-            | order by timestamp asc
-            """
-            
-            # Query for performance metrics
-            perf_query = f"""
-            performanceCounters
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | where name in ("% Processor Time", "Available Bytes", "Request rate", "Requests per Second")
-            | summarize 
-                avg_value = avg(value),
-                max_value = max(value),
-                min_value = min(value)
-            by bin(timestamp, 1m), name
-            | order by timestamp asc
-            """
-            
-            # Query for response time
-            response_time_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | summarize 
-                avg_duration = avg(duration),
-                p95_duration = percentile(duration, 95),
-                max_duration = max(duration)
-            by bin(timestamp, 1m)
-            | order by timestamp asc
-            """
-            
-            # Execute queries
-            error_response = logs_client.query_resource(resource_id, error_timeline_query, timespan=None)
-            perf_response = logs_client.query_resource(resource_id, perf_query, timespan=None)
-            response_response = logs_client.query_resource(resource_id, response_time_query, timespan=None)
+            # Execute query
+            correlation_query = _kql_bind(
+                _ERROR_METRIC_CORRELATION_QUERY, svc=service_name, start_time=start_date, end_time=end_date
+            )
+            response = await logs_client.query_resource(
+                resource_id, correlation_query, timespan=_parse_timespan(start_date, end_date)
+            )
             
-            if error_response.status == LogsQueryStatus.SUCCESS:
-                # Process error timeline
+            if response.status is _SUCCESS:
+                error_summary = {
+                    "total_errors": 0,
+                    "avg_error_rate": 0,
+                    "peak_error_time": None,
+                    "peak_error_rate": 0
+                }
                 error_timeline = []
-                max_error_rate = 0
-                peak_error_time = None
-                total_errors = 0
+                metric_rows = {}
                 
-                for table in error_response.tables:
+                for table in response.tables:
+                    idx = _index_cols(table, (
+                        "metric", "timestamps", "error_rates", "failed_counts", "total_errors", "avg_error_rate",
+                        "peak_error_rate", "peak_error_time", "correlation", "peak_value", "normal_value", "breach_count"
+                    ))
+                    metric_i = idx["metric"]
                     for row in table.rows:
-                        data = dict(zip([_col_name(col) for col in table.columns], row))
-                        error_timeline.append({
-                            "timestamp": _format_datetime(data["timestamp"]),
-                            "error_rate": data.get("error_rate", 0),
-                            "failed_requests": data.get("failed_requests", 0)
-                        })
-                        total_errors += data.get("failed_requests", 0)
-                        if data.get("error_rate", 0) > max_error_rate:
-                            max_error_rate = data.get("error_rate", 0)
-                            peak_error_time = _format_datetime(data["timestamp"])
-                
-                # Process performance metrics
-                metric_timelines = {}
-                if perf_response.status == LogsQueryStatus.SUCCESS:
-                    for table in perf_response.tables:
-                        for row in table.rows:
-                            data = dict(zip([_col_name(col) for col in table.columns], row))
-                            metric_name = data["name"]
-                            if metric_name not in metric_timelines:
-                                metric_timelines[metric_name] = []
-                            metric_timelines[metric_name].append({
-                                "timestamp": _format_datetime(data["timestamp"]),
-                                "avg_value": data.get("avg_value", 0),
-                                "max_value": data.get("max_value", 0)
-                            })
-                
-                # Process response time
-                response_timeline = []
-                if response_response.status == LogsQueryStatus.SUCCESS:
-                    for table in response_response.tables:
-                        for row in table.rows:
-                            data = dict(zip([_col_name(col) for col in table.columns], row))
-                            response_timeline.append({
-                                "timestamp": _format_datetime(data["timestamp"]),
-                                "avg_duration": data.get("avg_duration", 0),
-                                "p95_duration": data.get("p95_duration", 0)
-                            })
+                        if row[metric_i]:
+                            metric_rows[row[metric_i]] = {
+                                name: row[idx[name]] for name in ("correlation", "peak_value", "normal_value", "breach_count")
+                            }
+                            continue
+                        
+                        error_timeline = [
+                            {"timestamp": _format_series_timestamp(timestamp), "error_rate": error_rate,
+                             "failed_requests": failed_requests}
+                            for timestamp, error_rate, failed_requests in zip(
+                                _parse_dynamic(row[idx["timestamps"]]),
+                                _parse_dynamic(row[idx["error_rates"]]),
+                                _parse_dynamic(row[idx["failed_counts"]])
+                            )
+                        ]
+                        error_summary = {
+                            "total_errors": row[idx["total_errors"]] or 0,
+                            "avg_error_rate": row[idx["avg_error_rate"]] or 0,
+                            "peak_error_time": _format_datetime(row[idx["peak_error_time"]]),
+                            "peak_error_rate": row[idx["peak_error_rate"]] or 0
+                        }
                 
-                # Perform correlation analysis
+                # Build correlations from the server-side series statistics, bucketing HIGH ones by metric
                 metric_correlations = []
-                
-                # Helper function to calculate correlation
-                def calculate_correlation(error_rates, metric_values):
-                    if len(error_rates) != len(metric_values) or len(error_rates) < 2:
-                        return 0
-                    
-                    # Simple correlation calculation
-                    avg_error = sum(error_rates) / len(error_rates)
-                    avg_metric = sum(metric_values) / len(metric_values)
-                    
-                    numerator = sum((e - avg_error) * (m - avg_metric) for e, m in zip(error_rates, metric_values))
-                    denominator_e = sum((e - avg_error) ** 2 for e in error_rates) ** 0.5
-                    denominator_m = sum((m - avg_metric) ** 2 for m in metric_values) ** 0.5
-                    
-                    if denominator_e == 0 or denominator_m == 0:
-                        return 0
-                    
-                    return numerator / (denominator_e * denominator_m)
-                
-                # Correlate each metric
-                error_rates = [e["error_rate"] for e in error_timeline]
+                high_correlations = {}
                 
                 # CPU correlation
-                if "% Processor Time" in metric_timelines:
-                    cpu_values = [m["avg_value"] for m in metric_timelines["% Processor Time"]]
-                    if len(cpu_values) == len(error_rates):
-                        correlation = calculate_correlation(error_rates, cpu_values)
-                        finding = ""
-                        if correlation > 0.7:
-                            high_cpu_errors = [e for e, c in zip(error_timeline, cpu_values) if c > 80 and e["error_rate"] > 10]
-                            if high_cpu_errors:
-                                finding = f"Errors increase when CPU > 80%"
-                        
-                        metric_correlations.append({
-                            "metric": "cpu_percentage",
-                            "correlation_score": round(abs(correlation), 2),
-                            "correlation": "HIGH" if abs(correlation) > 0.7 else "MEDIUM" if abs(correlation) > 0.4 else "LOW",
-                            "finding": finding or "No clear pattern",
-                            "peak_value": max(cpu_values) if cpu_values else 0,
-                            "normal_value": sum(cpu_values[:10]) / min(10, len(cpu_values)) if cpu_values else 0
-                        })
+                cpu = metric_rows.get("% Processor Time")
+                if cpu:
+                    correlation = cpu["correlation"] or 0
+                    finding = ""
+                    if correlation > 0.7 and cpu["breach_count"]:
+                        finding = f"Errors increase when CPU > 80%"
+                    
+                    metric_correlation = {
+                        "metric": "cpu_percentage",
+                        "correlation_score": round(abs(correlation), 2),
+                        "correlation": "HIGH" if abs(correlation) > 0.7 else "MEDIUM" if abs(correlation) > 0.4 else "LOW",
+                        "finding": finding or "No clear pattern",
+                        "peak_value": cpu["peak_value"] or 0,
+                        "normal_value": cpu["normal_value"] or 0
+                    }
+                    metric_correlations.append(metric_correlation)
+                    if metric_correlation["correlation"] == "HIGH":
+                        high_correlations["cpu_percentage"] = metric_correlation
                 
                 # Response time correlation  
-                if response_timeline:
-                    response_values = [r["avg_duration"] for r in response_timeline]
-                    if len(response_values) == len(error_rates):
-                        correlation = calculate_correlation(error_rates, response_values)
-                        finding = ""
-                        if correlation > 0.7:
-                            finding = "Response time spike correlates with errors"
-                        
-                        metric_correlations.append({
-                            "metric": "response_time_ms",
-                            "correlation_score": round(abs(correlation), 2),
-                            "correlation": "HIGH" if abs(correlation) > 0.7 else "MEDIUM" if abs(correlation) > 0.4 else "LOW",
-                            "finding": finding or "No clear pattern",
-                            "peak_value": max(response_values) if response_values else 0,
-                            "normal_value": sum(response_values[:10]) / min(10, len(response_values)) if response_values else 0
-                        })
+                response_time = metric_rows.get("response_time_ms")
+                if response_time:
+                    correlation = response_time["correlation"] or 0
+                    finding = ""
+                    if correlation > 0.7:
+                        finding = "Response time spike correlates with errors"
+                    
+                    metric_correlation = {
+                        "metric": "response_time_ms",
+                        "correlation_score": round(abs(correlation), 2),
+                        "correlation": "HIGH" if abs(correlation) > 0.7 else "MEDIUM" if abs(correlation) > 0.4 else "LOW",
+                        "finding": finding or "No clear pattern",
+                        "peak_value": response_time["peak_value"] or 0,
+                        "normal_value": response_time["normal_value"] or 0
+                    }
+                    metric_correlations.append(metric_correlation)
+                    if metric_correlation["correlation"] == "HIGH":
+                        high_correlations["response_time_ms"] = metric_correlation
                 
                 # Generate root cause hypotheses
                 root_cause_hypothesis = []
                 recommendations = []
                 
-                high_correlations = [m for m in metric_correlations if m["correlation"] == "HIGH"]
-                if any(m["metric"] == "cpu_percentage" for m in high_correlations):
+                if "cpu_percentage" in high_correlations:
                     root_cause_hypothesis.append("CPU saturation is likely causing timeouts and errors")
                     recommendations.append("Enable autoscaling with CPU threshold at 70%")
                     recommendations.append("Profile application to identify CPU-intensive operations")
                 
-                if any(m["metric"] == "response_time_ms" for m in high_correlations):
+                if "response_time_ms" in high_correlations:
                     root_cause_hypothesis.append("Performance degradation is causing failures")
                     recommendations.append("Investigate slow queries and external API calls")
                 
@@ -1695,16 +1920,11 @@ def create_correlate_errors_and_metrics_tool(secret_retriever: ISecretRetriever)
                     recommendations.append("Check application logs for specific error messages")
                 
                 return {
-                    "error_summary": {
-                        "total_errors": total_errors,
-                        "avg_error_rate": round(sum(error_rates) / len(error_rates), 1) if error_rates else 0,
-                        "peak_error_time": peak_error_time,
-                        "peak_error_rate": max_error_rate
-                    },
+                    "error_summary": error_summary,
                     "metric_correlations": metric_correlations,
                     "timeline_analysis": {
-                        "error_timeline": error_timeline[:20],  # Limit for readability
-                        "metrics_available": list(metric_timelines.keys())
+                        "error_timeline": error_timeline,  # First 20 minutes, sliced server-side
+                        "metrics_available": [name for name in metric_rows if name != "response_time_ms"]
                     },
                     "root_cause_hypothesis": root_cause_hypothesis,
                     "recommendations": recommendations,
@@ -1713,7 +1933,7 @@ def create_correlate_errors_and_metrics_tool(secret_retriever: ISecretRetriever)
                 }
             else:
                 return {
-                    "error": f"Failed to retrieve error timeline: {error_response.status}",
+                    "error": f"Failed to retrieve error timeline: {response.status}",
                     "error_type": "QueryError"
                 }
                 
@@ -1744,9 +1964,68 @@ def create_correlate_errors_and_metrics_tool(secret_retriever: ISecretRetriever)
     return tool
 
 
+# Current period totals and top error types from one materialized scan of requests and exceptions
+_ERROR_SUMMARY_QUERY = """
+let errors = materialize(union
+    (requests | where success == false | extend error_type = tostring(customDimensions["Exception.Type"])),
+    (exceptions | extend error_type = type)
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(et) or type == et);
+let total_errors = toscalar(errors | count);
+let unique_error_types = toscalar(errors | summarize dcount(error_type));
+errors
+| summarize count = count() by error_type
+| order by count desc
+| limit 10
+| extend total_errors = total_errors, unique_error_types = unique_error_types
+"""
+
+
+# Hourly request and error counts for the current period
+_HOURLY_ERRORS_QUERY = """
+requests
+| where isempty(svc) or cloud_RoleName == svc
+| summarize
+    total = count(),
+    errors = countif(success == false),
+    error_rate = round(countif(success == false) * 100.0 / count(), 1)
+by bin(timestamp, 1h)
+| order by timestamp asc
+"""
+
+
+# Error totals and hourly average over the baseline window, plus the first 5-minute bin of the
+# current period whose failures exceed 3x that average; a single row comes back
+_BASELINE_ANOMALY_QUERY = """
+let scoped = requests | where isempty(svc) or cloud_RoleName == svc;
+let baseline = materialize(scoped
+| where timestamp between (todatetime(baseline_start) .. todatetime(baseline_end))
+| summarize
+    total_requests = count(),
+    total_errors = countif(success == false),
+    hourly_avg_errors = countif(success == false) / baseline_hours);
+let threshold = toscalar(baseline | project hourly_avg_errors * 3);
+let anomaly_start = toscalar(scoped
+| where timestamp between (todatetime(start_time) .. todatetime(end_time))
+| where success == false
+| summarize error_count = count() by bin(timestamp, 5m)
+| where error_count > threshold
+| top 1 by timestamp asc
+| project timestamp);
+baseline
+| extend anomaly_start = anomaly_start
+"""
+
+
+# Error types that are routinely present and so never reported as new
+_BASELINE_ERROR_TYPES = frozenset({"ValidationException", "NotFoundException"})
+
+
 def create_get_error_trends_analysis_tool(secret_retriever: ISecretRetriever):
     """Factory function to create error trends analysis tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def get_error_trends_analysis(
         service_name: Optional[str] = None,
         error_type: Optional[str] = None,
@@ -1833,156 +2112,116 @@ def create_get_error_trends_analysis_tool(secret_retriever: ISecretRetriever):
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time range
+            now = datetime.now(timezone.utc)
             if not start_date:
-                start_date = (datetime.utcnow() - timedelta(hours=4)).isoformat() + "Z"
+                start_date = (now - timedelta(hours=4)).isoformat().replace("+00:00", "Z")
             if not end_date:
-                end_date = datetime.utcnow().isoformat() + "Z"
+                end_date = now.isoformat().replace("+00:00", "Z")
             
             # Calculate baseline period
-            current_start = datetime.fromisoformat(start_date.rstrip('Z'))
-            current_end = datetime.fromisoformat(end_date.rstrip('Z'))
-            baseline_end = current_start - timedelta(days=1)
+            current_span = _parse_timespan(start_date, end_date)
+            baseline_end = current_span[0] - timedelta(days=1)
             baseline_start = baseline_end - timedelta(days=baseline_days)
             
-            # Build filters
-            service_filter = f"| where cloud_RoleName == '{service_name}'" if service_name else ""
-            error_filter = f"| where type == '{error_type}'" if error_type else ""
-            
-            # Current period analysis
-            current_query = f"""
-            let errors = union
-                (requests | where success == false | extend error_type = tostring(customDimensions["Exception.Type"])),
-                (exceptions | extend error_type = type);
-            errors
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            {error_filter}
-            | summarize 
-                total_errors = count(),
-                unique_error_types = dcount(error_type),
-                error_types = make_set(error_type),
-                by_type = make_bag(pack(error_type, 1))
-            """
-            
-            # Error type breakdown
-            error_breakdown_query = f"""
-            union
-                (requests | where success == false | extend error_type = tostring(customDimensions["Exception.Type"])),
-                (exceptions | extend error_type = type)
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | summarize count = count() by error_type
-            | order by count desc
-            | limit 10
-            """
-            
-            # Hourly trend
-            hourly_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | summarize 
-                total = count(),
-                errors = countif(success == false),
-                error_rate = round(countif(success == false) * 100.0 / count(), 1)
-            by bin(timestamp, 1h)
-            | order by timestamp asc
-            """
-            
-            # Baseline analysis
-            baseline_query = f"""
-            requests
-            | where timestamp >= datetime('{baseline_start.isoformat()}Z') and timestamp <= datetime('{baseline_end.isoformat()}Z')
-            {service_filter}
-            | summarize 
-                total_requests = count(),
-                total_errors = countif(success == false),
-                hourly_avg_errors = countif(success == false) / {baseline_days * 24.0}
-            """
-            
-            # Find anomaly start time
-            anomaly_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {service_filter}
-            | where success == false
-            | summarize error_count = count() by bin(timestamp, 5m)
-            | order by timestamp asc
-            """
+            # Bind filters ahead of each query body; time ranges are applied server-side through `timespan`
+            current_query, hourly_query = (
+                _kql_bind(query, svc=service_name, et=error_type)
+                for query in (_ERROR_SUMMARY_QUERY, _HOURLY_ERRORS_QUERY)
+            )
+            # The baseline/anomaly query spans both windows, so it bounds each one explicitly
+            baseline_query = _kql_bind(
+                _BASELINE_ANOMALY_QUERY,
+                svc=service_name,
+                baseline_hours=baseline_days * 24.0,
+                baseline_start=baseline_start.isoformat(),
+                baseline_end=baseline_end.isoformat(),
+                start_time=current_span[0].isoformat(),
+                end_time=current_span[1].isoformat()
+            )
             
             # Execute queries
-            current_response = logs_client.query_resource(resource_id, current_query, timespan=None)
-            breakdown_response = logs_client.query_resource(resource_id, error_breakdown_query, timespan=None)
-            hourly_response = logs_client.query_resource(resource_id, hourly_query, timespan=None)
-            baseline_response = logs_client.query_resource(resource_id, baseline_query, timespan=None)
-            anomaly_response = logs_client.query_resource(resource_id, anomaly_query, timespan=None)
-            
-            if current_response.status == LogsQueryStatus.SUCCESS and baseline_response.status == LogsQueryStatus.SUCCESS:
-                # Process current period
-                current_data = {}
+            (current_response, hourly_response), (baseline_response,) = await asyncio.gather(
+                _query_resource_concurrently(
+                    logs_client, resource_id, current_query, hourly_query, timespan=current_span
+                ),
+                _query_resource_concurrently(
+                    logs_client, resource_id, baseline_query, timespan=(baseline_start, current_span[1])
+                )
+            )
+            
+            if current_response.status is _SUCCESS and baseline_response.status is _SUCCESS:
+                # Process current period totals and error breakdown
+                error_breakdown = []
+                current_types = set()
+                total_errors = 0
+                unique_error_types = 0
                 for table in current_response.tables:
+                    idx = _index_cols(table, ("error_type", "count", "total_errors", "unique_error_types"))
+                    type_i, count_i = idx["error_type"], idx["count"]
                     if table.rows:
-                        current_data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
-                
-                # Process error breakdown
-                error_breakdown = []
-                total_errors = current_data.get("total_errors", 0)
-                for table in breakdown_response.tables:
+                        first_row = table.rows[0]
+                        total_errors = first_row[idx["total_errors"]] or 0
+                        unique_error_types = first_row[idx["unique_error_types"]] or 0
+                    inv_total = 100.0 / total_errors if total_errors > 0 else 0.0
                     for row in table.rows:
-                        error_info = dict(zip([_col_name(col) for col in table.columns], row))
+                        error_count = row[count_i] or 0
+                        current_types.add(row[type_i])
                         error_breakdown.append({
-                            "type": error_info.get("error_type", "Unknown"),
-                            "count": error_info.get("count", 0),
-                            "percentage": round(error_info.get("count", 0) / total_errors * 100, 1) if total_errors > 0 else 0
+                            "type": row[type_i] if row[type_i] is not None else "Unknown",
+                            "count": error_count,
+                            "percentage": round(error_count * inv_total, 1)
                         })
                 
-                # Process baseline
-                baseline_data = {}
+                # Process baseline; the anomaly start (first 5-minute bin above 3x baseline) is found server-side
+                baseline_hourly_avg = 0
+                baseline_total_errors = 0
+                anomaly_start = None
                 for table in baseline_response.tables:
                     if table.rows:
-                        baseline_data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
-                
-                baseline_hourly_avg = baseline_data.get("hourly_avg_errors", 0)
+                        idx = _index_cols(table, ("hourly_avg_errors", "total_errors", "anomaly_start"))
+                        first_row = table.rows[0]
+                        baseline_hourly_avg = first_row[idx["hourly_avg_errors"]]
+                        baseline_total_errors = first_row[idx["total_errors"]]
+                        anomaly_start = _format_datetime(first_row[idx["anomaly_start"]])
                 
                 # Process hourly trend and compare with baseline
+                # Sum, first/last and monotonicity are tracked in the same pass, so the hourly series is
+                # walked once rather than re-scanned for the averages and pattern checks below
                 hourly_comparison = []
-                current_hourly_errors = []
+                hourly_count = 0
+                hourly_sum = 0
+                first_hour_errors = last_hour_errors = None
+                non_decreasing = True
+                inv_baseline = 100.0 / baseline_hourly_avg if baseline_hourly_avg > 0 else 0.0
+                rounded_baseline = round(baseline_hourly_avg)
+                append, format_datetime = hourly_comparison.append, _format_datetime
                 for table in hourly_response.tables:
+                    idx = _index_cols(table, ("timestamp", "errors"))
+                    ts_i, errors_i = idx["timestamp"], idx["errors"]
                     for row in table.rows:
-                        hourly_data = dict(zip([_col_name(col) for col in table.columns], row))
-                        errors = hourly_data.get("errors", 0)
-                        current_hourly_errors.append(errors)
+                        errors = row[errors_i]
+                        if last_hour_errors is None:
+                            first_hour_errors = errors
+                        elif errors < last_hour_errors:
+                            non_decreasing = False
+                        last_hour_errors = errors
+                        hourly_count += 1
+                        hourly_sum += errors
                         
-                        deviation = ((errors - baseline_hourly_avg) / baseline_hourly_avg * 100) if baseline_hourly_avg > 0 else 0
-                        hourly_comparison.append({
-                            "hour": _format_datetime(hourly_data["timestamp"]),
+                        deviation = (errors - baseline_hourly_avg) * inv_baseline
+                        append({
+                            "hour": format_datetime(row[ts_i]),
                             "errors": errors,
-                            "baseline_avg": round(baseline_hourly_avg),
+                            "baseline_avg": rounded_baseline,
                             "deviation": f"+{round(deviation)}%" if deviation > 0 else f"{round(deviation)}%"
                         })
                 
-                # Detect anomaly start
-                anomaly_start = None
-                for table in anomaly_response.tables:
-                    for row in table.rows:
-                        anomaly_data = dict(zip([_col_name(col) for col in table.columns], row))
-                        if anomaly_data.get("error_count", 0) > baseline_hourly_avg * 3:  # 3x baseline
-                            anomaly_start = _format_datetime(anomaly_data["timestamp"])
-                            break
-                    if anomaly_start:
-                        break
-                
                 # Calculate trend analysis
-                current_avg_hourly = sum(current_hourly_errors) / len(current_hourly_errors) if current_hourly_errors else 0
+                current_avg_hourly = hourly_sum / hourly_count if hourly_count else 0
                 change_percentage = ((current_avg_hourly - baseline_hourly_avg) / baseline_hourly_avg * 100) if baseline_hourly_avg > 0 else 0
                 
                 # Determine trend
@@ -2002,11 +2241,11 @@ def create_get_error_trends_analysis_tool(secret_retriever: ISecretRetriever):
                 # Pattern detection
                 pattern = "NORMAL"
                 pattern_desc = "Error rate within normal range"
-                if len(current_hourly_errors) > 1:
-                    if current_hourly_errors[-1] > current_hourly_errors[0] * 5:
+                if hourly_count > 1:
+                    if last_hour_errors > first_hour_errors * 5:
                         pattern = "SUDDEN_SPIKE"
                         pattern_desc = "Errors increased dramatically in short time"
-                    elif all(current_hourly_errors[i] >= current_hourly_errors[i-1] for i in range(1, len(current_hourly_errors))):
+                    elif non_decreasing:
                         pattern = "GRADUAL_INCREASE"
                         pattern_desc = "Errors steadily increasing over time"
                 
@@ -2021,23 +2260,23 @@ def create_get_error_trends_analysis_tool(secret_retriever: ISecretRetriever):
                 elif pattern == "GRADUAL_INCREASE":
                     recommendations.append("Gradual increase suggests growing problem - check for resource leaks or capacity issues")
                 
-                # Check for new error types
-                current_types = set(current_data.get("error_types", []))
-                new_error_types = []
-                for error_type in current_types:
-                    if error_type and error_type not in ["ValidationException", "NotFoundException"]:  # Common baseline errors
-                        new_error_types.append(f"{error_type} - new in current period")
+                # Check for new error types among the per-type breakdown
+                new_error_types = [
+                    f"{error_type} - new in current period"
+                    for error_type in current_types
+                    if error_type and error_type not in _BASELINE_ERROR_TYPES
+                ]
                 
                 return {
                     "current_period": {
                         "total_errors": total_errors,
-                        "unique_error_types": current_data.get("unique_error_types", 0),
+                        "unique_error_types": unique_error_types,
                         "most_common_errors": error_breakdown[:5],
                         "time_range": {"from": start_date, "to": end_date}
                     },
                     "baseline_period": {
                         "avg_errors_per_hour": round(baseline_hourly_avg, 1),
-                        "total_errors": baseline_data.get("total_errors", 0),
+                        "total_errors": baseline_total_errors,
                         "baseline_days": baseline_days
                     },
                     "trend_analysis": {
@@ -2092,7 +2331,9 @@ def create_get_error_trends_analysis_tool(secret_retriever: ISecretRetriever):
 
 def create_execute_flexible_kql_query_tool(secret_retriever: ISecretRetriever):
     """Factory function to create flexible KQL query execution tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def execute_flexible_kql_query(
         query: str,
         max_results: int = 100,
@@ -2157,17 +2398,13 @@ def create_execute_flexible_kql_query_tool(secret_retriever: ISecretRetriever):
         - Queries are limited by timeout and result count
         - Large queries may impact Application Insights performance
         - Avoid queries that scan entire history without time filters
-        - Use 'limit' clause to control result size
+        - At most max_results rows (capped at 1000) are returned; a `take` is always appended,
+          so a larger limit in the query does not increase the rows transferred
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Validate and sanitize query
             if not query or not isinstance(query, str):
@@ -2176,54 +2413,51 @@ def create_execute_flexible_kql_query_tool(secret_retriever: ISecretRetriever):
                     "error_type": "InvalidInput"
                 }
             
-            # Add safety limits if not present
-            if "limit" not in query.lower():
-                query = f"{query.rstrip().rstrip(';')} | limit {min(max_results, 1000)}"
+            # Always cap the rows sent back; the outermost `take` wins over any limit in the query.
+            # One extra row is requested so truncation can still be reported.
+            max_results = min(max_results, 1000)
+            query = f"{query.rstrip().rstrip(';')} | take {max_results + 1}"
             
             # Log query for debugging (in production, ensure no sensitive data)
-            import time
-            start_time = time.time()
+            start_ns = time.perf_counter_ns()
             
             # Execute query with timeout
-            response = logs_client.query_resource(
+            response = await logs_client.query_resource(
                 resource_id, 
                 query, 
                 timespan=None,
                 server_timeout=timeout_seconds
             )
             
-            execution_time_ms = int((time.time() - start_time) * 1000)
+            execution_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             
-            if response.status == LogsQueryStatus.SUCCESS:
+            if response.status is _SUCCESS:
                 results = []
                 column_names = []
                 column_types = []
+                truncated = False
                 
                 for table in response.tables:
-                    # Get column metadata
-                    if not column_names and table.columns:
-                        column_names = [_col_name(col) for col in table.columns]
-                        column_types = [col.type for col in table.columns if hasattr(col, 'type')]
+                    # Get column metadata once per table; rows always match their table's columns
+                    table_columns = [_col_name(col) for col in table.columns]
+                    table_types = _column_types(table)
+                    if not column_names and table_columns:
+                        column_names = table_columns
+                        column_types = [kql_type for kql_type in table_types if kql_type]
                     
-                    # Process rows
-                    for row in table.rows:
-                        # Convert row to dictionary with proper type handling
-                        row_dict = {}
-                        for i, value in enumerate(row):
-                            col_name = column_names[i] if i < len(column_names) else f"column_{i}"
-                            # Handle datetime serialization
-                            if isinstance(value, datetime):
-                                row_dict[col_name] = value.isoformat()
-                            elif value is None:
-                                row_dict[col_name] = None
-                            else:
-                                row_dict[col_name] = value
-                        results.append(row_dict)
+                    # Process rows up to max_results with a converter specialised to this table's schema,
+                    # which handles datetime serialization; rows past the cap are never converted
+                    rows = table.rows
+                    remaining = max_results - len(results)
+                    if len(rows) > remaining:
+                        truncated = True
+                    convert = _row_converter(tuple(table_columns), tuple(table_types))
+                    results.extend(map(convert, islice(rows, max(remaining, 0))))
                 
                 return {
-                    "results": results[:max_results],
+                    "results": results,
                     "row_count": len(results),
-                    "truncated": len(results) > max_results,
+                    "truncated": truncated,
                     "column_names": column_names,
                     "column_types": column_types,
                     "query_executed": query,
@@ -2235,11 +2469,12 @@ def create_execute_flexible_kql_query_tool(secret_retriever: ISecretRetriever):
                 # Partial failure - some results but also errors
                 partial_results = []
                 for table in response.tables:
-                    for row in table.rows:
-                        partial_results.append(dict(zip([_col_name(col) for col in table.columns], row)))
+                    table_columns = [_col_name(col) for col in table.columns]
+                    for row in islice(table.rows, max(max_results - len(partial_results), 0)):
+                        partial_results.append(dict(zip(table_columns, row)))
                 
                 return {
-                    "results": partial_results[:max_results],
+                    "results": partial_results,
                     "row_count": len(partial_results),
                     "error": "Query partially failed - some results returned",
                     "error_details": str(response.partial_error) if hasattr(response, 'partial_error') else "Unknown error",
@@ -2285,9 +2520,122 @@ def create_execute_flexible_kql_query_tool(secret_retriever: ISecretRetriever):
     return tool
 
 
+# Request totals, average and percentile durations and throughput for one window. The percentile
+# names and values are substituted with str.format; everything else is bound with let statements.
+_PERF_SUMMARY_QUERY = """
+requests
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(endpoint) or name contains endpoint
+| summarize
+    total_requests = count(),
+    successful_requests = countif(success == true),
+    avg_duration = avg(duration),
+    ({percentile_names}) = percentiles(duration, {percentile_values}),
+    requests_per_minute = count() / period_minutes
+"""
+
+
+# Endpoints whose current average duration is 1.5x or more their baseline average, projected to the
+# final output fields
+_ENDPOINT_BREAKDOWN_QUERY = """
+let scoped = requests
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(endpoint) or name contains endpoint;
+let current_period = scoped
+| where timestamp between (todatetime(start_time) .. todatetime(end_time))
+| summarize
+    current_avg = avg(duration),
+    current_count = count(),
+    current_failures = countif(success == false)
+by name;
+let baseline_period = scoped
+| where timestamp between (todatetime(baseline_start) .. todatetime(baseline_end))
+| summarize
+    baseline_avg = avg(duration),
+    baseline_count = count()
+by name;
+current_period
+| join kind=leftouter baseline_period on name
+| extend
+    increase_percent = round((current_avg - baseline_avg) / baseline_avg * 100, 0),
+    impact = case(
+        current_avg > baseline_avg * 5 and current_count > 100, "HIGH",
+        current_avg > baseline_avg * 2 and current_count > 50, "MEDIUM",
+        "LOW"
+    )
+| where current_avg > baseline_avg * 1.5  // Only show degraded endpoints
+| top 10 by current_count desc
+| project
+    name,
+    current_avg_ms = tolong(round(current_avg)),
+    baseline_avg_ms = tolong(round(baseline_avg)),
+    increase_percent,
+    current_count,
+    current_failures,
+    impact
+"""
+
+
+# Average and p95 duration and success rate per 15 minutes of the current period
+_PERF_TIMELINE_QUERY = """
+requests
+| where isempty(svc) or cloud_RoleName == svc
+| where isempty(endpoint) or name contains endpoint
+| summarize
+    avg_duration = avg(duration),
+    p95_duration = tolong(round(percentile(duration, 95))),
+    success_rate = round(countif(success == true) * 100.0 / count(), 1)
+by bin(timestamp, 15m)
+| order by timestamp asc
+"""
+
+
+# Headline figures of one performance window; a window without data reads as idle and fully successful
+_PerfSummary = namedtuple("_PerfSummary", ("avg_ms", "rpm", "success_rate"))
+_EMPTY_PERF_SUMMARY = _PerfSummary(avg_ms=0, rpm=0, success_rate=100)
+
+
+def _read_perf_summary(response, percentiles: List[int]) -> Tuple[Dict[str, Any], _PerfSummary]:
+    """Read the single row of a performance summary query into the reported dict and its headline figures.
+
+    The dict is empty when the query returned no row.
+    """
+    for table in response.tables:
+        if table.rows:
+            row_data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
+            total_requests = row_data.get("total_requests") or 0
+            summary = _PerfSummary(
+                avg_ms=round(row_data.get("avg_duration") or 0),
+                rpm=round(row_data.get("requests_per_minute") or 0, 1),
+                success_rate=round((row_data.get("successful_requests") or 0) / total_requests * 100, 1)
+                if total_requests else 100
+            )
+            perf = {
+                "avg_response_time_ms": summary.avg_ms,
+                "requests_per_minute": summary.rpm,
+                "success_rate": summary.success_rate
+            }
+            # Add percentiles
+            for p in percentiles:
+                perf[f"p{p}_response_time_ms"] = round(row_data.get(f"p{p}") or 0)
+            return perf, summary
+    return {}, _EMPTY_PERF_SUMMARY
+
+
+# SLO checks on the current period: (metric, comparison that signals a breach, threshold, message).
+# Metrics that were not requested, such as an omitted percentile, are skipped.
+_SLO_RULES = (
+    ("p95_response_time_ms", gt, 1000, "P95 response time exceeds 1000ms SLO (current: {value}ms)"),
+    ("success_rate", lt, 99, "Success rate below 99% SLO (current: {value}%)"),
+    ("p99_response_time_ms", gt, 3000, "P99 response time exceeds 3000ms SLO (current: {value}ms)"),
+)
+
+
 def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRetriever):
     """Factory function to create performance baseline comparison tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def get_performance_baseline_comparison(
         service_name: Optional[str] = None,
         endpoint_pattern: Optional[str] = None,
@@ -2391,13 +2739,8 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Set default time ranges
             if not start_date:
@@ -2410,144 +2753,66 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
                 percentiles = [50, 90, 95, 99]
             
             # Calculate baseline period
-            current_start = datetime.fromisoformat(start_date.rstrip('Z'))
-            baseline_end = current_start - timedelta(days=1)
+            current_span = _parse_timespan(start_date, end_date)
+            baseline_end = current_span[0] - timedelta(days=1)
             baseline_start = baseline_end - timedelta(days=baseline_days)
+            baseline_span = (baseline_start, baseline_end)
             
-            # Build filters
-            filters = []
-            if service_name:
-                filters.append(f"cloud_RoleName == '{service_name}'")
-            if endpoint_pattern:
-                filters.append(f"name contains '{endpoint_pattern}'")
+            # Bind filters ahead of each query body; time ranges are applied server-side through `timespan`
+            filters = {"svc": service_name, "endpoint": endpoint_pattern}
             
-            where_clause = f"| where {' and '.join(filters)}" if filters else ""
-            
-            # Current period performance query
-            percentile_calcs = ", ".join([f"p{p} = percentile(duration, {p})" for p in percentiles])
-            
-            current_perf_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {where_clause}
-            | summarize 
-                total_requests = count(),
-                successful_requests = countif(success == true),
-                avg_duration = avg(duration),
-                {percentile_calcs},
-                requests_per_minute = count() / {(datetime.fromisoformat(end_date.rstrip('Z')) - datetime.fromisoformat(start_date.rstrip('Z'))).total_seconds() / 60}
-            """
-            
-            # Baseline performance query
-            baseline_perf_query = f"""
-            requests
-            | where timestamp >= datetime('{baseline_start.isoformat()}Z') and timestamp <= datetime('{baseline_end.isoformat()}Z')
-            {where_clause}
-            | summarize 
-                total_requests = count(),
-                successful_requests = countif(success == true),
-                avg_duration = avg(duration),
-                {percentile_calcs},
-                requests_per_minute = count() / {(baseline_end - baseline_start).total_seconds() / 60}
-            """
+            # Current period and baseline performance queries share one template; only the percentile
+            # list is substituted, and all requested percentiles come from one percentiles() aggregation
+            perf_query = _PERF_SUMMARY_QUERY.format(
+                percentile_names=", ".join(f"p{p}" for p in percentiles),
+                percentile_values=", ".join(str(p) for p in percentiles)
+            )
+            current_perf_query = _kql_bind(
+                perf_query, **filters, period_minutes=(current_span[1] - current_span[0]).total_seconds() / 60
+            )
+            baseline_perf_query = _kql_bind(
+                perf_query, **filters, period_minutes=(baseline_end - baseline_start).total_seconds() / 60
+            )
             
-            # Endpoint breakdown query
-            endpoint_query = f"""
-            let current_period = requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {where_clause}
-            | summarize 
-                current_avg = avg(duration),
-                current_count = count(),
-                current_failures = countif(success == false)
-            by name;
-            let baseline_period = requests
-            | where timestamp >= datetime('{baseline_start.isoformat()}Z') and timestamp <= datetime('{baseline_end.isoformat()}Z')
-            {where_clause}
-            | summarize 
-                baseline_avg = avg(duration),
-                baseline_count = count()
-            by name;
-            current_period
-            | join kind=leftouter baseline_period on name
-            | extend 
-                increase_percent = round((current_avg - baseline_avg) / baseline_avg * 100, 0),
-                impact = case(
-                    current_avg > baseline_avg * 5 and current_count > 100, "HIGH",
-                    current_avg > baseline_avg * 2 and current_count > 50, "MEDIUM",
-                    "LOW"
-                )
-            | where current_avg > baseline_avg * 1.5  // Only show degraded endpoints
-            | order by current_count desc
-            | limit 10
-            """
+            # Endpoint breakdown query; it spans both windows, so it bounds each one explicitly
+            endpoint_query = _kql_bind(
+                _ENDPOINT_BREAKDOWN_QUERY,
+                **filters,
+                start_time=current_span[0].isoformat(),
+                end_time=current_span[1].isoformat(),
+                baseline_start=baseline_start.isoformat(),
+                baseline_end=baseline_end.isoformat()
+            )
             
             # Performance timeline query
-            timeline_query = f"""
-            requests
-            | where timestamp >= datetime('{start_date}') and timestamp <= datetime('{end_date}')
-            {where_clause}
-            | summarize 
-                avg_duration = avg(duration),
-                p95_duration = percentile(duration, 95),
-                success_rate = countif(success == true) * 100.0 / count()
-            by bin(timestamp, 15m)
-            | order by timestamp asc
-            """
+            timeline_query = _kql_bind(_PERF_TIMELINE_QUERY, **filters)
             
             # Execute queries
-            current_response = logs_client.query_resource(resource_id, current_perf_query, timespan=None)
-            baseline_response = logs_client.query_resource(resource_id, baseline_perf_query, timespan=None)
-            endpoint_response = logs_client.query_resource(resource_id, endpoint_query, timespan=None)
-            timeline_response = logs_client.query_resource(resource_id, timeline_query, timespan=None)
-            
-            if current_response.status == LogsQueryStatus.SUCCESS and baseline_response.status == LogsQueryStatus.SUCCESS:
-                # Process current performance
-                current_perf = {}
-                for table in current_response.tables:
-                    if table.rows:
-                        row_data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
-                        current_perf = {
-                            "avg_response_time_ms": round(row_data.get("avg_duration", 0)),
-                            "requests_per_minute": round(row_data.get("requests_per_minute", 0), 1),
-                            "success_rate": round(row_data.get("successful_requests", 0) / row_data.get("total_requests", 1) * 100, 1)
-                        }
-                        # Add percentiles
-                        for p in percentiles:
-                            current_perf[f"p{p}_response_time_ms"] = round(row_data.get(f"p{p}", 0))
-                
-                # Process baseline performance
-                baseline_perf = {}
-                for table in baseline_response.tables:
-                    if table.rows:
-                        row_data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
-                        baseline_perf = {
-                            "avg_response_time_ms": round(row_data.get("avg_duration", 0)),
-                            "requests_per_minute": round(row_data.get("requests_per_minute", 0), 1),
-                            "success_rate": round(row_data.get("successful_requests", 0) / row_data.get("total_requests", 1) * 100, 1)
-                        }
-                        # Add percentiles
-                        for p in percentiles:
-                            baseline_perf[f"p{p}_response_time_ms"] = round(row_data.get(f"p{p}", 0))
+            (current_response, timeline_response), (baseline_response,), (endpoint_response,) = await asyncio.gather(
+                _query_resource_concurrently(
+                    logs_client, resource_id, current_perf_query, timeline_query, timespan=current_span
+                ),
+                _query_resource_concurrently(logs_client, resource_id, baseline_perf_query, timespan=baseline_span),
+                _query_resource_concurrently(
+                    logs_client, resource_id, endpoint_query, timespan=(baseline_start, current_span[1])
+                )
+            )
+            
+            if current_response.status is _SUCCESS and baseline_response.status is _SUCCESS:
+                # Process current and baseline performance
+                current_perf, current = _read_perf_summary(current_response, percentiles)
+                baseline_perf, baseline = _read_perf_summary(baseline_response, percentiles)
                 
                 # Calculate comparison
                 response_time_increase = 0
-                if baseline_perf.get("avg_response_time_ms", 0) > 0:
-                    response_time_increase = round(
-                        (current_perf.get("avg_response_time_ms", 0) - baseline_perf.get("avg_response_time_ms", 0)) 
-                        / baseline_perf.get("avg_response_time_ms", 1) * 100
-                    )
+                if baseline.avg_ms > 0:
+                    response_time_increase = round((current.avg_ms - baseline.avg_ms) / baseline.avg_ms * 100)
                 
                 throughput_change = 0
-                if baseline_perf.get("requests_per_minute", 0) > 0:
-                    throughput_change = round(
-                        (current_perf.get("requests_per_minute", 0) - baseline_perf.get("requests_per_minute", 0))
-                        / baseline_perf.get("requests_per_minute", 1) * 100, 1
-                    )
+                if baseline.rpm > 0:
+                    throughput_change = round((current.rpm - baseline.rpm) / baseline.rpm * 100, 1)
                 
-                success_rate_drop = round(
-                    baseline_perf.get("success_rate", 100) - current_perf.get("success_rate", 100), 1
-                )
+                success_rate_drop = round(baseline.success_rate - current.success_rate, 1)
                 
                 # Determine severity
                 severity = "NORMAL"
@@ -2573,16 +2838,18 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
                 # Process endpoint breakdown
                 endpoint_breakdown = []
                 for table in endpoint_response.tables:
-                    for row in table.rows:
-                        endpoint_data = dict(zip([_col_name(col) for col in table.columns], row))
+                    for name, current_avg_ms, baseline_avg_ms, increase_percent, current_count, current_failures, impact in _rows_as(
+                        table, "name", "current_avg_ms", "baseline_avg_ms", "increase_percent",
+                        "current_count", "current_failures", "impact"
+                    ):
                         endpoint_breakdown.append({
-                            "endpoint": endpoint_data.get("name"),
-                            "current_avg_ms": round(endpoint_data.get("current_avg", 0)),
-                            "baseline_avg_ms": round(endpoint_data.get("baseline_avg", 0)),
-                            "increase_percent": endpoint_data.get("increase_percent", 0),
-                            "request_count": endpoint_data.get("current_count", 0),
-                            "failure_count": endpoint_data.get("current_failures", 0),
-                            "impact": endpoint_data.get("impact", "LOW")
+                            "endpoint": name,
+                            "current_avg_ms": current_avg_ms,
+                            "baseline_avg_ms": baseline_avg_ms,
+                            "increase_percent": increase_percent,
+                            "request_count": current_count,
+                            "failure_count": current_failures,
+                            "impact": impact
                         })
                 
                 # Process timeline
@@ -2592,39 +2859,39 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
                 worst_response_time = 0
                 
                 for table in timeline_response.tables:
-                    for row in table.rows:
-                        timeline_data = dict(zip([_col_name(col) for col in table.columns], row))
-                        avg_duration = timeline_data.get("avg_duration", 0)
-                        
-                        performance_timeline.append({
-                            "timestamp": _format_datetime(timeline_data["timestamp"]),
-                            "avg_response_time_ms": round(avg_duration),
-                            "p95_response_time_ms": round(timeline_data.get("p95_duration", 0)),
-                            "success_rate": round(timeline_data.get("success_rate", 0), 1)
-                        })
+                    for timestamp, avg_duration, p95_duration, success_rate in _rows_as(
+                        table, "timestamp", "avg_duration", "p95_duration", "success_rate"
+                    ):
+                        avg_duration = avg_duration or 0
+                        # Only the first 10 buckets are reported; later ones still feed the analysis below
+                        if len(performance_timeline) < 10:
+                            performance_timeline.append({
+                                "timestamp": _format_datetime(timestamp),
+                                "avg_response_time_ms": round(avg_duration),
+                                "p95_response_time_ms": p95_duration,
+                                "success_rate": success_rate
+                            })
                         
                         # Detect degradation start
-                        if not degradation_start and avg_duration > baseline_perf.get("avg_response_time_ms", 0) * 2:
-                            degradation_start = _format_datetime(timeline_data["timestamp"])
+                        if not degradation_start and avg_duration > baseline.avg_ms * 2:
+                            degradation_start = _format_datetime(timestamp)
                         
                         # Track worst period
                         if avg_duration > worst_response_time:
                             worst_response_time = avg_duration
-                            worst_period_start = _format_datetime(timeline_data["timestamp"])
+                            worst_period_start = _format_datetime(timestamp)
                 
                 # Check SLO violations
-                slo_violations = []
-                if current_perf.get("p95_response_time_ms", 0) > 1000:
-                    slo_violations.append(f"P95 response time exceeds 1000ms SLO (current: {current_perf['p95_response_time_ms']}ms)")
-                if current_perf.get("success_rate", 100) < 99:
-                    slo_violations.append(f"Success rate below 99% SLO (current: {current_perf['success_rate']}%)")
-                if current_perf.get("p99_response_time_ms", 0) > 3000:
-                    slo_violations.append(f"P99 response time exceeds 3000ms SLO (current: {current_perf['p99_response_time_ms']}ms)")
+                slo_violations = [
+                    message.format(value=current_perf[metric])
+                    for metric, breached, threshold, message in _SLO_RULES
+                    if metric in current_perf and breached(current_perf[metric], threshold)
+                ]
                 
                 # Generate insights
                 insights = []
                 if response_time_increase > 100:
-                    factor = round(current_perf.get("avg_response_time_ms", 0) / baseline_perf.get("avg_response_time_ms", 1))
+                    factor = round(current.avg_ms / baseline.avg_ms)
                     insights.append(f"Performance is {factor}x slower than baseline")
                 
                 high_impact_endpoints = [e for e in endpoint_breakdown if e["impact"] == "HIGH"]
@@ -2658,7 +2925,7 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
                     "comparison": comparison,
                     "endpoint_breakdown": endpoint_breakdown,
                     "time_based_analysis": {
-                        "performance_timeline": performance_timeline[:10],  # Limit for readability
+                        "performance_timeline": performance_timeline,  # First 10 buckets, for readability
                         "degradation_start": degradation_start,
                         "worst_period": f"{worst_period_start} (avg: {round(worst_response_time)}ms)" if worst_period_start else None
                     },
@@ -2708,9 +2975,110 @@ def create_get_performance_baseline_comparison_tool(secret_retriever: ISecretRet
     return tool
 
 
+# Filters selecting the searched pattern, bound as `pat`, for each supported search type
+_SEARCH_FILTERS = {
+    "message": "message contains pat or innermostMessage contains pat",
+    "exception_type": "type == pat or tostring(customDimensions['Exception.Type']) == pat",
+    "custom_dimension": "tostring(customDimensions) contains pat"
+}
+
+
+# Earliest failed request or exception matching the search filter
+_FIRST_OCCURRENCE_QUERY = """
+union isfuzzy=true
+    (requests
+    | where success == false
+    | extend error_message = tostring(customDimensions["Exception.Message"])
+    | extend exception_type = tostring(customDimensions["Exception.Type"])),
+    exceptions
+| where {search_filter}
+| summarize arg_min(
+    timestamp,
+    operation_Id,
+    itemType,
+    message,
+    innermostMessage,
+    type,
+    method,
+    name,
+    url,
+    duration,
+    cloud_RoleName,
+    customDimensions)
+| where isnotnull(timestamp)
+"""
+
+
+# Matching failures per 5 minutes
+_OCCURRENCE_TIMELINE_QUERY = """
+union isfuzzy=true
+    (requests
+    | where success == false),
+    exceptions
+| where {search_filter}
+| summarize count = count() by bin(timestamp, 5m)
+| order by timestamp asc
+| limit 50
+"""
+
+
+# Deployment, config and restart traces plus other exception types around the first occurrence
+_OCCURRENCE_CONTEXT_QUERY = """
+union isfuzzy=true
+    (traces
+    | where message contains "deploy" or message contains "config" or message contains "restart"
+    | project timestamp, message, severityLevel),
+    (exceptions
+    | where not({search_filter})
+    | summarize count = count(), first_seen = min(timestamp) by type
+    | project first_seen, type, count)
+| order by timestamp asc
+| limit 20
+"""
+
+
+# (first occurrence, timeline, context) query bodies, rendered once per search type
+_OCCURRENCE_QUERIES = {
+    search_type: tuple(
+        query.format(search_filter=search_filter)
+        for query in (_FIRST_OCCURRENCE_QUERY, _OCCURRENCE_TIMELINE_QUERY, _OCCURRENCE_CONTEXT_QUERY)
+    )
+    for search_type, search_filter in _SEARCH_FILTERS.items()
+}
+
+
+def _classify_spread(counts: List[int]) -> str:
+    """Classify error growth across consecutive bucket counts.
+
+    Growth is EXPONENTIAL when every bucket at least doubles the previous one, LINEAR when every rate
+    is between 1 and 2, and IRREGULAR otherwise. Buckets following an empty one are not rated.
+    """
+    exponential = linear = True
+    rated = False
+    for earlier, later in zip(counts, counts[1:]):
+        if earlier > 0:
+            rate = later / earlier
+            rated = True
+            exponential = exponential and rate >= 2
+            linear = linear and 1 <= rate <= 2
+            if not (exponential or linear):
+                break
+    if rated and exponential:
+        return "EXPONENTIAL"
+    if rated and linear:
+        return "LINEAR"
+    return "IRREGULAR"
+
+
+# Keywords in trace messages that mark a likely trigger event
+_TRIGGER_RE = re.compile(r"deploy|config", re.IGNORECASE)
+
+
 def create_find_first_occurrence_tool(secret_retriever: ISecretRetriever):
     """Factory function to create first occurrence finder tool with injected secret retriever."""
+    get_secrets = _cached_azure_secrets(secret_retriever)
     
+    @_on_background_loop
     async def find_first_occurrence(
         error_pattern: str,
         search_type: str = "message",
@@ -2797,84 +3165,38 @@ def create_find_first_occurrence_tool(secret_retriever: ISecretRetriever):
         """
         try:
             # Get credentials
-            tenant_id = await secret_retriever.retrieve_optional_secret_value("AZURE_TENANT_ID")
-            client_id = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_ID")
-            client_secret = await secret_retriever.retrieve_optional_secret_value("AZURE_CLIENT_SECRET")
-            resource_id = await secret_retriever.retrieve_mandatory_secret_value("AZURE_APP_RESOURCE")
-            
-            credential = _get_credential(tenant_id, client_id, client_secret)
-            logs_client = LogsQueryClient(credential=credential)
+            tenant_id, client_id, client_secret, resource_id = await get_secrets()
+            logs_client = _get_logs_client(tenant_id, client_id, client_secret)
             
             # Validate inputs
             lookback_hours = min(lookback_hours, 168)  # Max 7 days
-            end_time = datetime.utcnow()
+            end_time = datetime.now(timezone.utc)
             start_time = end_time - timedelta(hours=lookback_hours)
             
-            # Build search filter based on type
-            search_filters = {
-                "message": f"message contains '{error_pattern}' or innermostMessage contains '{error_pattern}'",
-                "exception_type": f"type == '{error_pattern}' or customDimensions['Exception.Type'] == '{error_pattern}'",
-                "custom_dimension": f"customDimensions contains '{error_pattern}'"
-            }
-            
-            search_filter = search_filters.get(search_type, search_filters["message"])
-            
-            # Find first occurrence
-            first_occurrence_query = f"""
-            union isfuzzy=true
-                (requests 
-                | where timestamp >= datetime('{start_time.isoformat()}Z')
-                | where success == false
-                | extend error_message = tostring(customDimensions["Exception.Message"])
-                | extend exception_type = tostring(customDimensions["Exception.Type"])),
-                (exceptions
-                | where timestamp >= datetime('{start_time.isoformat()}Z'))
-            | where {search_filter}
-            | order by timestamp asc
-            | limit 1
-            | project 
-                timestamp,
-                operation_Id,
-                itemType,
-                message,
-                innermostMessage,
-                type,
-                method,
-                name,
-                url,
-                duration,
-                cloud_RoleName,
-                customDimensions
-            """
-            
-            # Get occurrence timeline
-            timeline_query = f"""
-            union isfuzzy=true
-                (requests 
-                | where timestamp >= datetime('{start_time.isoformat()}Z')
-                | where success == false),
-                (exceptions
-                | where timestamp >= datetime('{start_time.isoformat()}Z'))
-            | where {search_filter}
-            | summarize count = count() by bin(timestamp, 5m)
-            | order by timestamp asc
-            | limit 50
-            """
+            # Pick the queries for the search type; the pattern is bound as `pat` ahead of each query body
+            first_occurrence_query, timeline_query, context_query = (
+                _kql_bind(query, pat=error_pattern)
+                for query in _OCCURRENCE_QUERIES.get(search_type, _OCCURRENCE_QUERIES["message"])
+            )
             
-            # Execute queries
-            first_response = logs_client.query_resource(resource_id, first_occurrence_query, timespan=None)
-            timeline_response = logs_client.query_resource(resource_id, timeline_query, timespan=None)
+            # Execute queries; the context query depends on the first occurrence, the timeline does not
+            first_response, timeline_response = await _query_resource_concurrently(
+                logs_client, resource_id, first_occurrence_query, timeline_query, timespan=(start_time, end_time)
+            )
             
-            if first_response.status == LogsQueryStatus.SUCCESS:
+            if first_response.status is _SUCCESS:
                 first_occurrence = None
+                first_ts = None
                 
-                # Process first occurrence
+                # Process first occurrence; the SDK already returns the timestamp as a datetime, kept for
+                # the context window and time-to-peak arithmetic below
                 for table in first_response.tables:
                     if table.rows:
-                        data = dict(zip([_col_name(col) for col in table.columns], row) for row in table.rows).__next__()
+                        data = dict(zip([_col_name(col) for col in table.columns], table.rows[0]))
+                        first_ts = data.get("timestamp")
                         
                         first_occurrence = {
-                            "timestamp": _format_datetime(data.get("timestamp")),
+                            "timestamp": _format_datetime(first_ts),
                             "operation_id": data.get("operation_Id"),
                             "error_message": data.get("message") or data.get("innermostMessage"),
                             "exception_type": data.get("type"),
@@ -2901,66 +3223,56 @@ def create_find_first_occurrence_tool(secret_retriever: ISecretRetriever):
                 total_occurrences = 0
                 peak_count = 0
                 peak_time = None
+                leading_counts = []  # First 4 buckets, for the spread pattern
                 
                 for table in timeline_response.tables:
-                    for row in table.rows:
-                        timeline_data = dict(zip([_col_name(col) for col in table.columns], row))
-                        count = timeline_data.get("count", 0)
+                    for timestamp, count in _rows_as(table, "timestamp", "count"):
+                        count = count or 0
                         total_occurrences += count
+                        if len(leading_counts) < 4:
+                            leading_counts.append(count)
                         
                         occurrence_timeline.append({
-                            "timestamp": _format_datetime(timeline_data["timestamp"]),
+                            "timestamp": _format_datetime(timestamp),
                             "count": count
                         })
                         
                         if count > peak_count:
                             peak_count = count
-                            peak_time = timeline_data["timestamp"]
+                            peak_time = timestamp
                 
                 # Get context if requested
                 context = {}
-                if include_context and first_occurrence["timestamp"]:
+                if include_context and first_ts:
                     # Look for events around first occurrence
-                    context_start = datetime.fromisoformat(first_occurrence["timestamp"].rstrip('Z')) - timedelta(minutes=10)
-                    context_end = datetime.fromisoformat(first_occurrence["timestamp"].rstrip('Z')) + timedelta(minutes=5)
+                    context_start = first_ts - timedelta(minutes=10)
+                    context_end = first_ts + timedelta(minutes=5)
                     
                     # Check for deployment events, config changes, or other errors
-                    context_query = f"""
-                    union isfuzzy=true
-                        (traces 
-                        | where timestamp between(datetime('{context_start.isoformat()}Z') .. datetime('{context_end.isoformat()}Z'))
-                        | where message contains "deploy" or message contains "config" or message contains "restart"
-                        | project timestamp, message, severityLevel),
-                        (exceptions
-                        | where timestamp between(datetime('{context_start.isoformat()}Z') .. datetime('{context_end.isoformat()}Z'))
-                        | where not({search_filter})
-                        | summarize count = count(), first_seen = min(timestamp) by type
-                        | project first_seen, type, count)
-                    | order by timestamp asc
-                    | limit 20
-                    """
-                    
-                    context_response = logs_client.query_resource(resource_id, context_query, timespan=None)
+                    context_response = await logs_client.query_resource(
+                        resource_id, context_query, timespan=(context_start, context_end)
+                    )
                     
-                    if context_response.status == LogsQueryStatus.SUCCESS:
+                    if context_response.status is _SUCCESS:
                         events_before = []
                         concurrent_errors = []
                         
                         for table in context_response.tables:
-                            for row in table.rows:
-                                if len(table.columns) == 3 and "message" in [_col_name(col) for col in table.columns]:
+                            # The union returns one table; error summary rows are the ones carrying first_seen
+                            for timestamp, message, error_type, first_seen in _rows_as(
+                                table, "timestamp", "message", "type", "first_seen"
+                            ):
+                                if first_seen is None:
                                     # This is a trace event
-                                    event_data = dict(zip([_col_name(col) for col in table.columns], row))
                                     events_before.append({
-                                        "timestamp": _format_datetime(event_data["timestamp"]),
+                                        "timestamp": _format_datetime(timestamp),
                                         "type": "trace",
-                                        "message": event_data.get("message", "")[:200]  # Truncate long messages
+                                        "message": (message or "")[:200]  # Truncate long messages
                                     })
                                 else:
                                     # This is an error summary
-                                    error_data = dict(zip([_col_name(col) for col in table.columns], row))
                                     concurrent_errors.append(
-                                        f"{error_data.get('type')} (started {_format_datetime(error_data.get('first_seen'))})"
+                                        f"{error_type} (started {_format_datetime(first_seen)})"
                                     )
                         
                         context = {
@@ -2972,25 +3284,11 @@ def create_find_first_occurrence_tool(secret_retriever: ISecretRetriever):
                 spread_pattern = "UNKNOWN"
                 time_to_peak = None
                 if len(occurrence_timeline) > 3:
-                    # Check if exponential growth
-                    growth_rates = []
-                    for i in range(1, min(4, len(occurrence_timeline))):
-                        if occurrence_timeline[i-1]["count"] > 0:
-                            rate = occurrence_timeline[i]["count"] / occurrence_timeline[i-1]["count"]
-                            growth_rates.append(rate)
-                    
-                    if growth_rates and all(rate >= 2 for rate in growth_rates):
-                        spread_pattern = "EXPONENTIAL"
-                    elif growth_rates and all(1 <= rate <= 2 for rate in growth_rates):
-                        spread_pattern = "LINEAR"
-                    else:
-                        spread_pattern = "IRREGULAR"
+                    spread_pattern = _classify_spread(leading_counts)
                     
                     # Calculate time to peak
-                    if peak_time and first_occurrence["timestamp"]:
-                        first_time = datetime.fromisoformat(first_occurrence["timestamp"].rstrip('Z'))
-                        peak_datetime = peak_time
-                        time_diff = (peak_datetime - first_time).total_seconds() / 60
+                    if peak_time and first_ts:
+                        time_diff = (peak_time - first_ts).total_seconds() / 60
                         time_to_peak = f"{int(time_diff)} minutes"
                 
                 # Generate analysis
@@ -3003,13 +3301,16 @@ def create_find_first_occurrence_tool(secret_retriever: ISecretRetriever):
                 
                 # Look for likely triggers
                 if context.get("events_before"):
-                    deploy_events = [e for e in context["events_before"] if "deploy" in e.get("message", "").lower()]
-                    config_events = [e for e in context["events_before"] if "config" in e.get("message", "").lower()]
+                    # Single pass over the events, keeping the first deployment and config change seen
+                    first_trigger = {}
+                    for event in context["events_before"]:
+                        for keyword in _TRIGGER_RE.findall(event.get("message", "")):
+                            first_trigger.setdefault(keyword.lower(), event)
                     
-                    if deploy_events:
-                        analysis["likely_trigger"] = f"Deployment at {deploy_events[0]['timestamp']}"
-                    elif config_events:
-                        analysis["likely_trigger"] = f"Configuration change at {config_events[0]['timestamp']}"
+                    if "deploy" in first_trigger:
+                        analysis["likely_trigger"] = f"Deployment at {first_trigger['deploy']['timestamp']}"
+                    elif "config" in first_trigger:
+                        analysis["likely_trigger"] = f"Configuration change at {first_trigger['config']['timestamp']}"
                 
                 # Generate recommendations
                 recommendations = []
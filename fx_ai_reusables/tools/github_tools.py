@@ -80,42 +80,212 @@ EXAMPLE AGENT ORCHESTRATION:
     ```
 """
 
-import warnings
 import asyncio
+import base64
+import copy
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import os
+import json
+import re
+import sqlite3
+import threading
 import logging
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from bisect import bisect_right
+from collections import OrderedDict
+from types import MappingProxyType
+from contextlib import closing, contextmanager
+from typing import Dict, Any, List, Literal, Optional, Tuple
+from datetime import datetime, timezone
+from functools import lru_cache
 from langchain_core.tools import StructuredTool
-from github import Github
 from fx_ai_reusables.secrets.interfaces.secret_retriever_interface import ISecretRetriever
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, quote, urlparse
 from fx_ai_reusables.helpers import run_async_in_sync_context
 from fx_ai_reusables.helpers.retry_decorator import retry_api_call
 
-# Suppress deprecation warnings from PyGithub
-warnings.filterwarnings('ignore', category=DeprecationWarning)
+logger = logging.getLogger(__name__)
+
+# How much of each associated PR to fetch
+PRDetail = Literal["summary", "full"]
 
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def _make_graphql_request(endpoint: str, headers: Dict[str, str], query: str, variables: Dict[str, Any], 
+@lru_cache(maxsize=16)
+def _get_session(token: str) -> requests.Session:
+    """
+    Return the keep-alive session for a token.
+    
+    Consecutive GitHub calls reuse pooled TCP/TLS connections, and the
+    authentication and API-version headers are set once per token.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+    session.headers.update({
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28"
+    })
+    return session
+
+
+# Upper bound on how long one tool call waits for GitHub's rate limits, whether paced by the
+# client-side governor or requested by the server (Retry-After / X-RateLimit-Reset)
+_MAX_RETRY_AFTER_SECONDS = 60
+
+
+class _RateLimitExceeded(requests.exceptions.RequestException):
+    """The token's GitHub budget would not allow a request within _MAX_RETRY_AFTER_SECONDS."""
+
+
+class _RateLimiter:
+    """
+    Client-side governor for one token's GitHub API budget.
+    
+    Bounds in-flight requests, spaces request starts by a minimum interval and,
+    once X-RateLimit-Remaining drops below a buffer, paces the remaining calls
+    evenly until X-RateLimit-Reset instead of running into secondary limits.
+    A call that would have to wait longer than max_wait fails fast instead.
+    """
+    
+    def __init__(self, max_concurrency: int = 4, min_interval: float = 0.1, remaining_buffer: int = 100,
+                 max_wait: float = _MAX_RETRY_AFTER_SECONDS):
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._min_interval = min_interval
+        self._remaining_buffer = remaining_buffer
+        self._max_wait = max_wait
+        self._interval = min_interval
+        self._next_start = 0.0
+    
+    @contextmanager
+    def slot(self):
+        """
+        Wait for the next permitted start time, then hold a concurrency slot.
+        
+        The wait happens before taking the slot, so a paced caller does not keep
+        others from the requests already permitted to run.
+        
+        Raises:
+            _RateLimitExceeded: If the next permitted start is more than max_wait away
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            if start - now > self._max_wait:
+                raise _RateLimitExceeded(
+                    f"GitHub rate limit nearly exhausted; next request allowed in {start - now:.0f}s"
+                )
+            self._next_start = start + self._interval
+        if start > now:
+            time.sleep(start - now)
+        with self._slots:
+            yield
+    
+    def update(self, response_headers) -> None:
+        """Adjust pacing from the rate-limit headers of a response."""
+        remaining = response_headers.get("X-RateLimit-Remaining")
+        reset = response_headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None:
+            return
+        remaining = int(remaining)
+        with self._lock:
+            if remaining >= self._remaining_buffer:
+                self._interval = self._min_interval
+                return
+            # Spread what is left of the budget over the time until the window resets
+            until_reset = max(float(reset) - time.time(), 0.0)
+            self._interval = max(self._min_interval, until_reset / max(remaining, 1))
+            if remaining == 0:
+                self._next_start = max(self._next_start, time.monotonic() + until_reset)
+
+
+# One governor per (Authorization header, GitHub rate-limit resource)
+_rate_limiters: Dict[tuple, _RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def _get_rate_limiter(authorization: str, resource: str) -> _RateLimiter:
+    """Return the shared rate limiter for a token and API resource ("graphql" or "core")."""
+    key = (authorization, resource)
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = _RateLimiter()
+        return limiter
+
+
+# Statuses worth retrying; anything else (401, 404, 422, ...) fails immediately
+_TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+class _TransientHTTPError(requests.exceptions.HTTPError):
+    """
+    HTTP error GitHub expects the client to retry (5xx, 429 or a rate-limit 403).
+    
+    retry_after holds the seconds GitHub asked to wait, or None to use the
+    retry decorator's backoff.
+    """
+    
+    def __init__(self, *args, retry_after: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+def _raise_for_status_transient_aware(response: requests.Response) -> None:
+    """
+    Raise for an error response, marking transient failures as retryable.
+    
+    When GitHub says when to come back (Retry-After, or X-RateLimit-Reset with
+    no remaining budget), the wait is carried on the error for retry_api_call to
+    honor; this function never sleeps.
+    """
+    if response.ok:
+        return
+    rate_limited = response.status_code == 403 and (
+        "Retry-After" in response.headers or response.headers.get("X-RateLimit-Remaining") == "0"
+    )
+    if response.status_code not in _TRANSIENT_STATUS_CODES and not rate_limited:
+        response.raise_for_status()
+    
+    retry_after = None
+    if "Retry-After" in response.headers:
+        try:
+            retry_after = max(float(response.headers["Retry-After"]), 0.0)
+        except ValueError:
+            retry_after = None
+    elif response.headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in response.headers:
+        retry_after = max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0.0)
+    raise _TransientHTTPError(f"{response.status_code} transient error for url: {response.url}",
+                              response=response, retry_after=retry_after)
+
+
+@lru_cache(maxsize=64)
+def _encoded_query_prefix(query: str) -> bytes:
+    """JSON-encode the constant part of a GraphQL request body once per query document."""
+    return b'{"query":' + json.dumps(query).encode() + b',"variables":'
+
+
+def _make_graphql_request(endpoint: str, session: requests.Session, query: str, variables: Dict[str, Any], 
                          timeout: int = 60, retry_attempts: int = 3) -> Dict[str, Any]:
     """
     Make a GraphQL request to GitHub API with automatic retry using retry_api_call decorator.
     
-    Retries on:
-    - HTTP errors (including 502, 503, 504)
-    - Request exceptions
+    Retries on transient failures only:
+    - HTTP 429, 500, 502, 503, 504 and rate-limit 403s (honoring Retry-After / X-RateLimit-Reset)
+    - Connection errors and timeouts
     
+    Permanent errors (401, 404, 422, ...) are raised immediately.
     Uses exponential backoff with configurable retry attempts.
     
     Args:
         endpoint: GraphQL API endpoint URL
-        headers: Request headers including authentication
+        session: Per-token session carrying authentication headers (see _get_session)
         query: GraphQL query string
         variables: Query variables
         timeout: Request timeout in seconds (default: 60)
@@ -128,100 +298,267 @@ def _make_graphql_request(endpoint: str, headers: Dict[str, str], query: str, va
         requests.exceptions.HTTPError: If request fails after all retries
         requests.exceptions.RequestException: If request fails after all retries
     """
+    limiter = _get_rate_limiter(session.headers.get("Authorization", ""), "graphql")
+    body = _encoded_query_prefix(query) + json.dumps(variables, separators=(",", ":")).encode() + b"}"
+    
     # Define the actual request function with retry decorator
     @retry_api_call(
         max_retries=retry_attempts,
         delay=1.0,
         backoff=2.0,
-        exceptions=(requests.exceptions.HTTPError, requests.exceptions.RequestException),
-        verbose=True
+        exceptions=(_TransientHTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        verbose=True,
+        max_total_delay=_MAX_RETRY_AFTER_SECONDS
     )
     def _do_request():
-        response = requests.post(
-            endpoint,
-            json={"query": query, "variables": variables},
-            headers=headers,
-            timeout=timeout
-        )
-        response.raise_for_status()
+        with limiter.slot():
+            response = session.post(endpoint, data=body, timeout=timeout)
+        limiter.update(response.headers)
+        _raise_for_status_transient_aware(response)
         return response.json()
     
     return _do_request()
 
 
+# "owner/repo" or a github.com URL (optionally with .git, a trailing slash or deeper path).
+# Owners are alphanumeric/hyphen only, which also rejects other hosts given without a scheme.
+_REPO_RE = re.compile(
+    r"^(?:(?:https?://)?(?:www\.)?github\.com/)?([A-Za-z0-9-]+)/([\w.-]+?)(?:\.git)?(?:/\S*)?$",
+    re.IGNORECASE
+)
+
+
 def _parse_repo_identifier(repo_identifier: str) -> str:
     """Parse repository identifier from URL or owner/repo format."""
-    parsed = urlparse(repo_identifier)
-    if parsed.hostname and parsed.hostname.lower() == "github.com":
-        path_parts = [p for p in parsed.path.rstrip("/").split("/") if p]
-        if len(path_parts) >= 2:
-            return f"{path_parts[-2]}/{path_parts[-1]}"
-        else:
-            raise ValueError(f"Invalid GitHub repository URL (not enough path segments): {repo_identifier}")
-    return repo_identifier
+    owner, repo = _parse_repo_to_owner_repo(repo_identifier)
+    return f"{owner}/{repo}"
 
+@lru_cache(maxsize=256)
 def _parse_repo_to_owner_repo(repo_identifier: str) -> tuple:
     """
     Parse GitHub repository identifier to extract owner and repo name.
     
+    Agents pass the same few repositories over and over, so results are memoized.
+    
     Args:
         repo_identifier: GitHub repository URL or owner/repo format
     
     Returns:
         Tuple of (owner, repo)
     """
-    parsed = urlparse(repo_identifier)
-    if parsed.scheme and parsed.netloc:  # likely a URL
-        # Accept only exact 'github.com' host (case-insensitive)
-        if parsed.netloc.lower() == "github.com":
-            parts = parsed.path.strip("/").split("/")
-            if len(parts) >= 2:
-                return parts[0], parts[1]
-            else:
-                raise ValueError("URL does not contain owner/repo")
-        else:
-            raise ValueError("URL does not point to github.com")
-    elif "/" in repo_identifier:
-        parts = repo_identifier.strip("/").split("/")
-        if len(parts) == 2:
-            return parts[0], parts[1]
-        else:
-            raise ValueError("Owner/repo format must be 'owner/repo'")
-    else:
-        raise ValueError("Invalid repository URL format")
+    match = _REPO_RE.match(repo_identifier.strip())
+    if not match:
+        raise ValueError(f"Invalid repository identifier (expected 'owner/repo' or a github.com URL): {repo_identifier}")
+    return match.group(1), match.group(2)
 
-def _get_graphql_blame_for_line(token: str, owner: str, repo: str, file_path: str, 
-                                line_number: int, branch: str, timeout: int = 60) -> Optional[Dict]:
+_GITHUB_API_URL = "https://api.github.com"
+
+# How long a fetched GitHub token is reused before going back to the secret store
+_SECRET_CACHE_TTL_SECONDS = 300
+
+
+def _cached_github_token(secret_retriever: ISecretRetriever):
+    """Return a coroutine function yielding the GitHub token (GITHUB_TOKEN, else GITHUB_PAT).
+
+    The token is reused for _SECRET_CACHE_TTL_SECONDS, so repeated tool calls do not pay a secret store
+    round-trip each.
     """
-    Get git blame information for a specific line using GitHub GraphQL API.
-    Uses a two-step approach to avoid complexity limits:
-    1. Get blame commit
-    2. Query PR separately
+    cache = {"token": None, "expires_at": 0.0}
+
+    async def get_token():
+        if time.time() < cache["expires_at"]:
+            return cache["token"]
+        # Both secrets are requested together; GITHUB_TOKEN wins when set
+        primary, fallback = await asyncio.gather(
+            secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN"),
+            secret_retriever.retrieve_optional_secret_value("GITHUB_PAT"),
+        )
+        token = primary or fallback
+        if token:
+            # A missing token is not cached so a newly configured secret is picked up on the next call
+            cache["token"] = token
+            cache["expires_at"] = time.time() + _SECRET_CACHE_TTL_SECONDS
+        return token
+
+    return get_token
+
+
+def _rest_get(token: str, path: str, params: Optional[Dict[str, Any]] = None,
+              timeout: int = 30, retry_attempts: int = 3) -> requests.Response:
+    """
+    GET a GitHub REST resource with the token's pooled session.
+    
+    Requests go through the per-token rate limiter (search and core budgets are
+    tracked separately) and are retried on transient failures only.
     
     Args:
         token: GitHub authentication token
-        owner: Repository owner (username or org)
-        repo: Repository name
-        file_path: Path to file in repository
-        line_number: Line number to blame (1-indexed)
-        branch: Branch name (default: main)
-        timeout: Request timeout in seconds (default: 60)
+        path: API path starting with "/" (e.g. "/repos/owner/repo/commits/abc123")
+        params: Optional query parameters
+        timeout: Request timeout in seconds (default: 30)
+        retry_attempts: Number of retry attempts (default: 3)
     
     Returns:
-        Dictionary containing blame information or None if error
+        The successful response
+    
+    Raises:
+        requests.exceptions.HTTPError: For error statuses (after retries when transient)
     """
-    endpoint = "https://api.github.com/graphql"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    session = _get_session(token)
+    resource = "search" if path.startswith("/search/") else "core"
+    limiter = _get_rate_limiter(session.headers["Authorization"], resource)
+    
+    @retry_api_call(
+        max_retries=retry_attempts,
+        delay=1.0,
+        backoff=2.0,
+        exceptions=(_TransientHTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        verbose=True,
+        max_total_delay=_MAX_RETRY_AFTER_SECONDS
+    )
+    def _do_request():
+        with limiter.slot():
+            response = session.get(_GITHUB_API_URL + path, params=params, timeout=timeout)
+        limiter.update(response.headers)
+        _raise_for_status_transient_aware(response)
+        return response
+    
+    return _do_request()
+
+
+def _fetch_review_count(token: str, repo_name: str, number: int) -> int:
+    """
+    Count a pull request's reviews without downloading them.
+    
+    Requests a single review per page; when there is more than one page, the
+    Link header's "last" page number is the total.
+    """
+    response = _rest_get(token, f"/repos/{repo_name}/pulls/{number}/reviews", {"per_page": 1})
+    last = response.links.get("last")
+    if last:
+        return int(parse_qs(urlparse(last["url"]).query)["page"][0])
+    return len(response.json())
+
+
+# Files per page of the commit endpoint; GitHub paginates the file list of larger commits
+_COMMIT_FILES_PER_PAGE = 100
+
+
+def _fetch_commit(token: str, repo_name: str, commit_sha: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Fetch a commit's first page of files together with its total changed-file count.
     
-    # Step 1: Get blame information with minimal fields
-    blame_query = """
-    query($owner: String!, $repo: String!, $branch: String!, $path: String!) {
+    When the file list spans several pages, only the last page is requested: every
+    page before it is full, so the total follows from the Link header's "last" page
+    number and the size of that page.
+    
+    Returns:
+        Tuple of (commit payload with the first page of files, total number of changed files)
+    """
+    path = f"/repos/{repo_name}/commits/{commit_sha}"
+    response = _rest_get(token, path, {"per_page": _COMMIT_FILES_PER_PAGE})
+    commit = response.json()
+    last = response.links.get("last")
+    if not last:
+        return commit, len(commit.get("files", []))
+    last_page = int(parse_qs(urlparse(last["url"]).query)["page"][0])
+    last_response = _rest_get(token, path, {"per_page": _COMMIT_FILES_PER_PAGE, "page": last_page})
+    last_files = last_response.json().get("files", [])
+    return commit, (last_page - 1) * _COMMIT_FILES_PER_PAGE + len(last_files)
+
+
+def _file_exists(token: str, owner: str, repo: str, file_path: str, branch: str,
+                 timeout: int = 10) -> bool:
+    """
+    Check whether a file exists on a branch with a HEAD request to the contents API.
+    
+    Avoids downloading the (base64-encoded) file body just to validate the path.
+    
+    Raises:
+        requests.exceptions.HTTPError: For responses other than 200/404 (e.g. auth failures)
+    """
+    url = f"{_GITHUB_API_URL}/repos/{owner}/{repo}/contents/{quote(file_path)}"
+    session = _get_session(token)
+    limiter = _get_rate_limiter(session.headers["Authorization"], "core")
+    with limiter.slot():
+        response = session.head(
+            url,
+            params={"ref": branch},
+            timeout=timeout
+        )
+    limiter.update(response.headers)
+    if response.status_code == 404:
+        return False
+    response.raise_for_status()
+    return True
+
+
+# Shared PR selection used by both the combined blame query and the standalone PR queries.
+# Labels, review and commit counts are only selected when $fullDetail is true.
+_PR_FIELDS_FRAGMENT = """
+    fragment PRFields on PullRequest {
+        number
+        title
+        state
+        merged
+        mergedAt
+        url
+        author {
+            login
+        }
+        baseRefName
+        headRefName
+        additions
+        deletions
+        changedFiles
+        createdAt
+        updatedAt
+        closedAt
+        labels(first: $labelsLimit) @include(if: $fullDetail) {
+            nodes {
+                name
+                color
+            }
+        }
+        reviews(first: $reviewsLimit) @include(if: $fullDetail) {
+            totalCount
+        }
+        commits @include(if: $fullDetail) {
+            totalCount
+        }
+    }
+"""
+
+# GraphQL error types GitHub returns when a query asks for too many nodes
+_QUERY_COST_ERROR_TYPES = frozenset({"MAX_NODE_LIMIT_EXCEEDED", "RESOURCE_LIMITS_EXCEEDED"})
+
+
+# ============================================================================
+# GRAPHQL QUERIES
+# ============================================================================
+
+_GITHUB_GRAPHQL_ENDPOINT = "https://api.github.com/graphql"
+
+# Commit a branch currently points at
+_BRANCH_HEAD_QUERY = """
+    query($owner: String!, $repo: String!, $branch: String!) {
+        repository(owner: $owner, name: $repo) {
+            ref(qualifiedName: $branch) {
+                target {
+                    oid
+                }
+            }
+        }
+    }
+"""
+
+# Blame ranges, optionally with associated PRs inlined on each range commit
+_BLAME_QUERY_TEMPLATE = """
+    query($owner: String!, $repo: String!, $branch: String!, $path: String!%(pr_variables)s) {
         repository(owner: $owner, name: $repo) {
             ref(qualifiedName: $branch) {
                 target {
+                    oid
                     ... on Commit {
                         blame(path: $path) {
                             ranges {
@@ -230,27 +567,21 @@ def _get_graphql_blame_for_line(token: str, owner: str, repo: str, file_path: st
                                 age
                                 commit {
                                     oid
-                                    message
                                     messageHeadline
                                     messageBody
                                     committedDate
-                                    pushedDate
                                     author {
                                         name
                                         email
                                         user {
                                             login
-                                            url
                                         }
                                     }
-                                    committer {
-                                        name
-                                        email
-                                    }
                                     additions
                                     deletions
                                     changedFilesIfAvailable
                                     url
+                                    %(pr_selection)s
                                 }
                             }
                         }
@@ -259,198 +590,564 @@ def _get_graphql_blame_for_line(token: str, owner: str, repo: str, file_path: st
             }
         }
     }
+"""
+_BLAME_QUERY = _BLAME_QUERY_TEMPLATE % {"pr_variables": "", "pr_selection": ""}
+_BLAME_WITH_PRS_QUERY = _BLAME_QUERY_TEMPLATE % {
+    "pr_variables": ", $prLimit: Int!, $labelsLimit: Int!, $reviewsLimit: Int!, $fullDetail: Boolean!",
+    "pr_selection": "associatedPullRequests(first: $prLimit) { nodes { ...PRFields } }"
+} + _PR_FIELDS_FRAGMENT
+
+
+@lru_cache(maxsize=None)
+def _batched_pr_query(batch_size: int) -> str:
+    """Build the aliased PR query for a batch of commits (one $shaN variable per alias)."""
+    sha_variables = "".join(f", $sha{i}: GitObjectID!" for i in range(batch_size))
+    aliases = "\n".join(
+        f"c{i}: object(oid: $sha{i}) {{ ... on Commit {{ associatedPullRequests(first: $prLimit) {{ nodes {{ ...PRFields }} }} }} }}"
+        for i in range(batch_size)
+    )
+    return f"""
+    query($owner: String!, $repo: String!, $prLimit: Int!, $labelsLimit: Int!, $reviewsLimit: Int!, $fullDetail: Boolean!{sha_variables}) {{
+        repository(owner: $owner, name: $repo) {{
+            {aliases}
+        }}
+    }}
+""" + _PR_FIELDS_FRAGMENT
+
+
+def _is_query_cost_error(errors: List[Dict]) -> bool:
+    """Check whether GraphQL errors were caused by query node/complexity limits."""
+    for error in errors:
+        if error.get("type") in _QUERY_COST_ERROR_TYPES:
+            return True
+        if "complexity" in error.get("message", "").lower():
+            return True
+    return False
+
+
+def _find_blame_range(ranges: List[Dict], starts: List[int], line_number: int) -> Optional[Dict]:
+    """
+    Find the blame range covering a line by binary search.
+    
+    GitHub returns blame ranges ordered by startingLine and non-overlapping,
+    so the candidate is the last range starting at or before the line.
+    `starts` holds each range's startingLine; it is computed once when the
+    blame is cached (see _get_blame_ranges_cached), not per lookup.
+    """
+    idx = bisect_right(starts, line_number) - 1
+    if idx >= 0 and line_number <= ranges[idx]["endingLine"]:
+        return ranges[idx]
+    return None
+
+
+def _format_pull_requests(pr_nodes: List[Dict]) -> List[Dict]:
+    """
+    Format GraphQL pull request nodes into structured PR dictionaries.
+    
+    Labels, review and commit counts are only included when the node carries
+    them (i.e. the query ran with full detail).
+    """
+    prs = []
+    for pr in pr_nodes:
+        formatted = {
+            "number": pr["number"],
+            "title": pr["title"],
+            "state": pr["state"],
+            "merged": pr["merged"],
+            "merged_at": pr.get("mergedAt"),
+            "created_at": pr.get("createdAt"),
+            "updated_at": pr.get("updatedAt"),
+            "closed_at": pr.get("closedAt"),
+            "url": pr["url"],
+            "author": pr["author"]["login"] if pr.get("author") else "Unknown",
+            "base_branch": pr.get("baseRefName", "N/A"),
+            "head_branch": pr.get("headRefName", "N/A"),
+            "additions": pr["additions"],
+            "deletions": pr["deletions"],
+            "changed_files": pr["changedFiles"]
+        }
+        if "labels" in pr:
+            formatted["labels"] = [{"name": label["name"], "color": label.get("color", "")} for label in pr["labels"].get("nodes", [])]
+            formatted["review_count"] = pr.get("reviews", {}).get("totalCount", 0)
+            formatted["commit_count"] = pr.get("commits", {}).get("totalCount", 0)
+        prs.append(formatted)
+    return prs
+
+
+@lru_cache(maxsize=16)
+def _credential_fingerprint(credential: str) -> str:
+    """
+    Short, non-reversible digest of a token (or Authorization header) for cache keys.
+    
+    Every cache below is scoped by it, so data fetched with one token is never
+    served to a caller whose token may not have access to that repository.
+    """
+    return hashlib.sha256(credential.encode()).hexdigest()[:16]
+
+
+# Blame ranges cached per (credential, owner, repo, branch, path), validated against the branch head
+_BLAME_CACHE_MAX_ENTRIES = 256
+_BLAME_CACHE_TTL_SECONDS = 60
+_blame_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_blame_cache_lock = threading.Lock()
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _store_blame(key: tuple, blame: Any) -> None:
+    """Insert or refresh a blame cache entry (fetched now), evicting the least recently used."""
+    with _blame_cache_lock:
+        _blame_cache[key] = (time.monotonic(), blame)
+        _blame_cache.move_to_end(key)
+        while len(_blame_cache) > _BLAME_CACHE_MAX_ENTRIES:
+            _blame_cache.popitem(last=False)
+
+
+class _TTLCache:
+    """
+    Thread-safe LRU of tool results with a per-entry time to live.
+    
+    Values are deep-copied on the way in and out so callers can mutate the
+    dictionaries they receive without corrupting cached entries.
+    """
+    
+    def __init__(self, max_entries: int):
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+    
+    def put(self, key: tuple, value: Any, ttl_seconds: Optional[float]) -> None:
+        """Store a value; a ttl_seconds of None keeps it until evicted by size."""
+        expires_at = None if ttl_seconds is None else time.monotonic() + ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+# Commits are immutable, so details for a full SHA never expire. An abbreviated SHA could
+# become ambiguous as the repository grows, and PR membership of a commit changes over time.
+_COMMIT_CACHE_MAX_ENTRIES = 1024
+_SHORT_SHA_TTL_SECONDS = 120
+_PULL_REQUESTS_TTL_SECONDS = 120
+_commit_details_cache = _TTLCache(_COMMIT_CACHE_MAX_ENTRIES)
+_commit_pulls_cache = _TTLCache(_COMMIT_CACHE_MAX_ENTRIES)
+# Keys are (credential fingerprint, repo, sha) so entries are never shared between tokens.
+# (fingerprint, repo, abbreviated sha) -> full sha, so repeat lookups by short SHA land on the
+# full-SHA entries
+_short_sha_map = _TTLCache(_COMMIT_CACHE_MAX_ENTRIES)
+
+
+def _is_full_sha(commit_sha: str) -> bool:
+    """Check whether a SHA is a full 40-character hex object id."""
+    return len(commit_sha) == 40 and all(c in "0123456789abcdefABCDEF" for c in commit_sha)
+
+
+def _resolve_known_sha(token: str, repo_name: str, commit_sha: str) -> str:
+    """Return the full SHA previously resolved for an abbreviated one, or the SHA unchanged."""
+    if _is_full_sha(commit_sha):
+        return commit_sha
+    return _short_sha_map.get((_credential_fingerprint(token), repo_name.lower(), commit_sha.lower())) or commit_sha
+
+
+class _BlameDiskCache:
     """
+    Persistent blame store (SQLite) keyed by token fingerprint, repo, branch, path and branch head SHA.
     
+    A blame computed at a given head commit never changes, so entries survive
+    process restarts and are only superseded when the branch moves. The
+    database is created lazily on first use; each access opens its own
+    connection so the cache can be shared by worker threads.
+    """
+    
+    def __init__(self, cache_dir: str):
+        self._path = os.path.join(cache_dir, "github_blame_cache.sqlite3")
+        self._cache_dir = cache_dir
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    os.makedirs(self._cache_dir, exist_ok=True)
+                    with closing(sqlite3.connect(self._path)) as connection, connection:
+                        connection.execute(
+                            "CREATE TABLE IF NOT EXISTS blame (key TEXT PRIMARY KEY, blame TEXT NOT NULL)"
+                        )
+                    self._initialized = True
+        return sqlite3.connect(self._path, timeout=10)
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with closing(self._connect()) as connection:
+                row = connection.execute("SELECT blame FROM blame WHERE key = ?", (key,)).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Blame disk cache read failed: %s", e)
+            return None
+        return json.loads(row[0]) if row else None
+    
+    def put(self, key: str, blame: Dict[str, Any]) -> None:
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.execute("INSERT OR REPLACE INTO blame (key, blame) VALUES (?, ?)", (key, json.dumps(blame)))
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Blame disk cache write failed: %s", e)
+
+
+def _get_branch_head_sha(endpoint: str, session: requests.Session, owner: str, repo: str,
+                         branch: str, timeout: int = 60) -> Optional[str]:
+    """Resolve the commit SHA a branch currently points at (cheap GraphQL probe)."""
+    variables = {"owner": owner, "repo": repo, "branch": f"refs/heads/{branch}"}
+    data = _make_graphql_request(endpoint, session, _BRANCH_HEAD_QUERY, variables, timeout=timeout)
+    ref_data = ((data.get("data") or {}).get("repository") or {}).get("ref")
+    if not ref_data or not ref_data.get("target"):
+        return None
+    return ref_data["target"]["oid"]
+
+
+def _get_blame_ranges(endpoint: str, session: requests.Session, owner: str, repo: str,
+                      file_path: str, branch: str, timeout: int = 60,
+                      pr_fetch_limit: int = 10,
+                      pr_labels_limit: int = 10,
+                      pr_reviews_limit: int = 5,
+                      pr_detail: PRDetail = "summary") -> Optional[Dict[str, Any]]:
+    """
+    Fetch all blame ranges for a file on a branch.
+    
+    Blame ranges and their associated PRs are fetched in a single request. If
+    GitHub rejects the combined query for exceeding its node or complexity
+    limits, ranges are fetched without PRs and "combined" is False so the
+    caller queries PRs separately for the commit it needs.
+    
+    Returns:
+        Dictionary with "head_sha", "ranges" and "combined", or None if error
+    """
     variables = {
         "owner": owner,
         "repo": repo,
         "branch": f"refs/heads/{branch}",
-        "path": file_path
+        "path": file_path,
+        "prLimit": pr_fetch_limit,
+        "labelsLimit": pr_labels_limit,
+        "reviewsLimit": pr_reviews_limit,
+        "fullDetail": pr_detail == "full"
     }
     
-    try:
-        # Make GraphQL request with automatic retry (using Tenacity)
-        data = _make_graphql_request(endpoint, headers, blame_query, variables, timeout=timeout)
-        
-        if "errors" in data:
-            print(f"GraphQL errors: {data['errors']}")
-            return None
-        
-        # Get blame ranges from response
-        repo_data = data.get("data", {}).get("repository")
-        if not repo_data:
-            print(f"Repository not found: {owner}/{repo}")
-            return None
-        
-        ref_data = repo_data.get("ref")
-        if not ref_data:
-            print(f"Branch not found: {branch}")
-            return None
-        
-        target_data = ref_data.get("target")
-        if not target_data:
-            print(f"Target commit not found")
-            return None
-        
-        blame_data = target_data.get("blame")
-        if not blame_data:
-            print(f"No blame data found for {file_path}")
+    # Make GraphQL request with automatic retry (using Tenacity)
+    data = _make_graphql_request(endpoint, session, _BLAME_WITH_PRS_QUERY, variables, timeout=timeout)
+    
+    combined = True
+    if "errors" in data and _is_query_cost_error(data["errors"]):
+        # Combined query too expensive for this file: blame without PRs,
+        # then query PRs for the matching commit only
+        combined = False
+        data = _make_graphql_request(endpoint, session, _BLAME_QUERY,
+                                     {k: variables[k] for k in ("owner", "repo", "branch", "path")},
+                                     timeout=timeout)
+    
+    if "errors" in data:
+        logger.warning("GraphQL errors: %s", data["errors"])
+        return None
+    
+    # Get blame ranges from response
+    repo_data = data.get("data", {}).get("repository")
+    if not repo_data:
+        logger.warning("Repository not found: %s/%s", owner, repo)
+        return None
+    
+    ref_data = repo_data.get("ref")
+    if not ref_data:
+        logger.warning("Branch not found: %s", branch)
+        return None
+    
+    target_data = ref_data.get("target")
+    if not target_data:
+        logger.warning("Target commit not found")
+        return None
+    
+    blame_data = target_data.get("blame")
+    if not blame_data:
+        logger.warning("No blame data found for %s", file_path)
+        return None
+    
+    return {
+        "head_sha": target_data.get("oid"),
+        "ranges": blame_data.get("ranges", []),
+        "combined": combined
+    }
+
+
+def _get_blame_ranges_cached(endpoint: str, session: requests.Session, owner: str, repo: str,
+                             file_path: str, branch: str, timeout: int = 60,
+                             pr_fetch_limit: int = 10,
+                             pr_labels_limit: int = 10,
+                             pr_reviews_limit: int = 5,
+                             pr_detail: PRDetail = "summary",
+                             disk_cache: Optional[_BlameDiskCache] = None) -> Optional[Dict[str, Any]]:
+    """
+    Cached variant of _get_blame_ranges.
+    
+    Fresh entries (younger than the TTL) are served without any request. Once
+    an entry expires, the branch head is re-resolved: if it still matches the
+    cached head_sha the ranges are reused, otherwise blame is fetched again.
+    With a disk cache, in-memory misses resolve the branch head and reuse a
+    blame persisted for that exact head before querying GitHub.
+    
+    The returned blame is shared with the cache, so it is frozen: mappings are
+    read-only and lists are tuples. It also carries "starts", the ranges'
+    starting lines for _find_blame_range to bisect.
+    """
+    fingerprint = _credential_fingerprint(session.headers["Authorization"])
+    key = (fingerprint, owner, repo, branch, file_path, pr_fetch_limit, pr_labels_limit, pr_reviews_limit, pr_detail)
+    
+    with _blame_cache_lock:
+        entry = _blame_cache.get(key)
+        if entry is not None and time.monotonic() - entry[0] < _BLAME_CACHE_TTL_SECONDS:
+            _blame_cache.move_to_end(key)
+            return entry[1]
+    
+    def _disk_key(head_sha: str) -> str:
+        return f"{fingerprint}:{owner}/{repo}:{branch}:{file_path}:{head_sha}:{pr_fetch_limit}:{pr_labels_limit}:{pr_reviews_limit}:{pr_detail}"
+    
+    blame = None
+    if entry is not None or disk_cache is not None:
+        head_sha = _get_branch_head_sha(endpoint, session, owner, repo, branch, timeout=timeout)
+        if entry is not None:
+            cached_blame = entry[1]
+            if head_sha and head_sha == cached_blame["head_sha"]:
+                _store_blame(key, cached_blame)
+                return cached_blame
+            with _blame_cache_lock:
+                if _blame_cache.get(key) is entry:
+                    del _blame_cache[key]
+        if disk_cache is not None and head_sha:
+            blame = disk_cache.get(_disk_key(head_sha))
+    
+    if blame is None:
+        blame = _get_blame_ranges(endpoint, session, owner, repo, file_path, branch, timeout=timeout,
+                                  pr_fetch_limit=pr_fetch_limit,
+                                  pr_labels_limit=pr_labels_limit,
+                                  pr_reviews_limit=pr_reviews_limit,
+                                  pr_detail=pr_detail)
+        if blame is None:
             return None
+        if disk_cache is not None and blame["head_sha"]:
+            disk_cache.put(_disk_key(blame["head_sha"]), blame)
+    
+    blame = _freeze({**blame, "starts": [blame_range["startingLine"] for blame_range in blame["ranges"]]})
+    _store_blame(key, blame)
+    return blame
+
+
+def _get_graphql_blame_for_lines(token: str, owner: str, repo: str, file_path: str,
+                                 line_numbers: List[int], branch: str, timeout: int = 60,
+                                 pr_fetch_limit: int = 10,
+                                 pr_labels_limit: int = 10,
+                                 pr_reviews_limit: int = 5,
+                                 pr_detail: PRDetail = "summary",
+                                 disk_cache: Optional[_BlameDiskCache] = None) -> Dict[int, Dict]:
+    """
+    Get git blame information for several lines of one file using GitHub GraphQL API.
+    A single (cached) blame fetch answers every line. Associated PRs come inline
+    with the blame ranges when the query fits GitHub's complexity limits;
+    otherwise they are resolved for all distinct commits in one batched query.
+    
+    Args:
+        token: GitHub authentication token
+        owner: Repository owner (username or org)
+        repo: Repository name
+        file_path: Path to file in repository
+        line_numbers: Line numbers to blame (1-indexed)
+        branch: Branch name
+        timeout: Request timeout in seconds (default: 60)
+        pr_fetch_limit: Maximum number of PRs to fetch (default: 10)
+        pr_labels_limit: Maximum number of labels per PR to fetch (default: 10)
+        pr_reviews_limit: Maximum number of reviews to fetch (default: 5)
+        pr_detail: "summary" omits PR labels, review and commit counts; "full" includes them
+        disk_cache: Optional persistent blame store reused across process restarts
+    
+    Returns:
+        Dictionary mapping each resolved line number to its blame information.
+        Lines that could not be resolved are omitted.
+    """
+    endpoint = _GITHUB_GRAPHQL_ENDPOINT
+    session = _get_session(token)
+    
+    try:
+        blame = _get_blame_ranges_cached(endpoint, session, owner, repo, file_path, branch,
+                                         timeout=timeout,
+                                         pr_fetch_limit=pr_fetch_limit,
+                                         pr_labels_limit=pr_labels_limit,
+                                         pr_reviews_limit=pr_reviews_limit,
+                                         pr_detail=pr_detail,
+                                         disk_cache=disk_cache)
+        if blame is None:
+            return {}
         
-        ranges = blame_data.get("ranges", [])
+        # Find the range that contains each target line
+        line_ranges = {}
+        for line_number in line_numbers:
+            blame_range = _find_blame_range(blame["ranges"], blame["starts"], line_number)
+            if blame_range is None:
+                logger.warning("Line %d not found in blame ranges", line_number)
+                continue
+            line_ranges[line_number] = blame_range
         
-        # Find the range that contains our target line
-        for blame_range in ranges:
-            start = blame_range["startingLine"]
-            end = blame_range["endingLine"]
-            
-            if start <= line_number <= end:
-                commit = blame_range["commit"]
-                commit_sha = commit["oid"]
-                
-                # Step 2: Get associated PRs separately
-                prs = _get_prs_for_commit_graphql(token, owner, repo, commit_sha, timeout=timeout)
-                
-                # Format and return the result
-                return _format_blame_info(blame_range, line_number, prs)
+        if blame["combined"]:
+            prs_by_sha = {
+                blame_range["commit"]["oid"]: _format_pull_requests(
+                    (blame_range["commit"].get("associatedPullRequests") or {}).get("nodes", []))
+                for blame_range in line_ranges.values()
+            }
+        else:
+            commit_shas = list({blame_range["commit"]["oid"] for blame_range in line_ranges.values()})
+            prs_by_sha = _get_prs_for_commits_graphql(token, owner, repo, commit_shas, timeout=timeout,
+                                                      pr_fetch_limit=pr_fetch_limit,
+                                                      pr_labels_limit=pr_labels_limit,
+                                                      pr_reviews_limit=pr_reviews_limit,
+                                                      pr_detail=pr_detail)
         
-        print(f"Line {line_number} not found in blame ranges")
-        return None
+        # Format and return the results, measuring every age against one timestamp
+        now_utc = datetime.now(timezone.utc)
+        return {
+            line_number: _format_blame_info(blame_range, line_number,
+                                            prs_by_sha.get(blame_range["commit"]["oid"], []),
+                                            now_utc=now_utc)
+            for line_number, blame_range in line_ranges.items()
+        }
         
     except requests.exceptions.RequestException as e:
-        print(f"Request error: {str(e)}")
-        return None
+        logger.warning("Request error: %s", e)
+        return {}
     except Exception as e:
-        print(f"Unexpected error: {str(e)}")
-        return None
+        logger.warning("Unexpected error: %s", e)
+        return {}
 
-def _get_prs_for_commit_graphql(token: str, owner: str, repo: str, commit_sha: str, 
-                                timeout: int = 60,
+
+def _get_graphql_blame_for_line(token: str, owner: str, repo: str, file_path: str, 
+                                line_number: int, branch: str, timeout: int = 60,
                                 pr_fetch_limit: int = 10,
                                 pr_labels_limit: int = 10,
-                                pr_reviews_limit: int = 5) -> List[Dict]:
+                                pr_reviews_limit: int = 5,
+                                pr_detail: PRDetail = "summary",
+                                disk_cache: Optional[_BlameDiskCache] = None) -> Optional[Dict]:
     """
-    Get associated PRs for a commit using a separate GraphQL query.
-    This avoids hitting complexity limits when combined with blame query.
+    Get git blame information for a specific line using GitHub GraphQL API.
+    Single-line convenience over _get_graphql_blame_for_lines.
     
     Args:
         token: GitHub authentication token
-        owner: Repository owner
+        owner: Repository owner (username or org)
         repo: Repository name
-        commit_sha: Commit SHA
+        file_path: Path to file in repository
+        line_number: Line number to blame (1-indexed)
+        branch: Branch name (default: main)
         timeout: Request timeout in seconds (default: 60)
         pr_fetch_limit: Maximum number of PRs to fetch (default: 10)
         pr_labels_limit: Maximum number of labels per PR to fetch (default: 10)
         pr_reviews_limit: Maximum number of reviews to fetch (default: 5)
+        pr_detail: "summary" omits PR labels, review and commit counts; "full" includes them
+        disk_cache: Optional persistent blame store reused across process restarts
     
     Returns:
-        List of PR dictionaries
+        Dictionary containing blame information or None if error
     """
-    endpoint = "https://api.github.com/graphql"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    
-    pr_query = """
-    query($owner: String!, $repo: String!, $sha: GitObjectID!, $prLimit: Int!, $labelsLimit: Int!, $reviewsLimit: Int!) {
-        repository(owner: $owner, name: $repo) {
-            object(oid: $sha) {
-                ... on Commit {
-                    associatedPullRequests(first: $prLimit) {
-                        nodes {
-                            number
-                            title
-                            state
-                            merged
-                            mergedAt
-                            url
-                            author {
-                                login
-                            }
-                            baseRefName
-                            headRefName
-                            additions
-                            deletions
-                            changedFiles
-                            createdAt
-                            updatedAt
-                            closedAt
-                            labels(first: $labelsLimit) {
-                                nodes {
-                                    name
-                                    color
-                                }
-                            }
-                            reviews(first: $reviewsLimit) {
-                                totalCount
-                            }
-                            commits {
-                                totalCount
-                            }
-                        }
-                    }
-                }
-            }
-        }
-    }
+    blame_by_line = _get_graphql_blame_for_lines(token, owner, repo, file_path, [line_number], branch,
+                                                 timeout=timeout,
+                                                 pr_fetch_limit=pr_fetch_limit,
+                                                 pr_labels_limit=pr_labels_limit,
+                                                 pr_reviews_limit=pr_reviews_limit,
+                                                 pr_detail=pr_detail,
+                                                 disk_cache=disk_cache)
+    return blame_by_line.get(line_number)
+
+# Commits per aliased PR query; keeps batched documents under GitHub's node limit
+_PR_BATCH_SIZE = 25
+
+
+def _get_prs_for_commits_graphql(token: str, owner: str, repo: str, commit_shas: List[str],
+                                 timeout: int = 60,
+                                 pr_fetch_limit: int = 10,
+                                 pr_labels_limit: int = 10,
+                                 pr_reviews_limit: int = 5,
+                                 pr_detail: PRDetail = "summary") -> Dict[str, List[Dict]]:
     """
+    Get associated PRs for many commits using aliased GraphQL object lookups.
+    Each batch of up to _PR_BATCH_SIZE commits costs one request.
     
-    variables = {
-        "owner": owner,
-        "repo": repo,
-        "sha": commit_sha,
-        "prLimit": pr_fetch_limit,
-        "labelsLimit": pr_labels_limit,
-        "reviewsLimit": pr_reviews_limit
-    }
+    Args:
+        token: GitHub authentication token
+        owner: Repository owner
+        repo: Repository name
+        commit_shas: Commit SHAs
+        timeout: Request timeout in seconds (default: 60)
+        pr_fetch_limit: Maximum number of PRs to fetch per commit (default: 10)
+        pr_labels_limit: Maximum number of labels per PR to fetch (default: 10)
+        pr_reviews_limit: Maximum number of reviews to fetch (default: 5)
+        pr_detail: "summary" omits PR labels, review and commit counts; "full" includes them
     
-    try:
-        # Make GraphQL request with automatic retry (using Tenacity)
-        data = _make_graphql_request(endpoint, headers, pr_query, variables, timeout=timeout)
-        
-        if "errors" in data:
-            print(f"Error getting PRs: {data['errors']}")
-            return []
-        
-        pr_nodes = (
-            data.get("data", {})
-            .get("repository", {})
-            .get("object", {})
-            .get("associatedPullRequests", {})
-            .get("nodes", [])
-        )
+    Returns:
+        Dictionary mapping each commit SHA to its list of PR dictionaries
+    """
+    endpoint = _GITHUB_GRAPHQL_ENDPOINT
+    session = _get_session(token)
+    
+    prs_by_sha = {}
+    for batch_start in range(0, len(commit_shas), _PR_BATCH_SIZE):
+        batch = commit_shas[batch_start:batch_start + _PR_BATCH_SIZE]
         
-        prs = []
-        for pr in pr_nodes:
-            prs.append({
-                "number": pr["number"],
-                "title": pr["title"],
-                "state": pr["state"],
-                "merged": pr["merged"],
-                "merged_at": pr.get("mergedAt"),
-                "created_at": pr.get("createdAt"),
-                "updated_at": pr.get("updatedAt"),
-                "closed_at": pr.get("closedAt"),
-                "url": pr["url"],
-                "author": pr["author"]["login"] if pr.get("author") else "Unknown",
-                "base_branch": pr.get("baseRefName", "N/A"),
-                "head_branch": pr.get("headRefName", "N/A"),
-                "additions": pr["additions"],
-                "deletions": pr["deletions"],
-                "changed_files": pr["changedFiles"],
-                "labels": [{"name": label["name"], "color": label.get("color", "")} for label in pr.get("labels", {}).get("nodes", [])],
-                "review_count": pr.get("reviews", {}).get("totalCount", 0),
-                "commit_count": pr.get("commits", {}).get("totalCount", 0)
-            })
+        variables = {
+            "owner": owner,
+            "repo": repo,
+            "prLimit": pr_fetch_limit,
+            "labelsLimit": pr_labels_limit,
+            "reviewsLimit": pr_reviews_limit,
+            "fullDetail": pr_detail == "full"
+        }
+        variables.update({f"sha{i}": sha for i, sha in enumerate(batch)})
         
-        return prs
+        try:
+            # Make GraphQL request with automatic retry (using Tenacity)
+            data = _make_graphql_request(endpoint, session, _batched_pr_query(len(batch)), variables, timeout=timeout)
+            
+            if "errors" in data:
+                logger.warning("Error getting PRs: %s", data["errors"])
+            
+            repo_data = (data.get("data") or {}).get("repository") or {}
+            for i, sha in enumerate(batch):
+                pr_nodes = ((repo_data.get(f"c{i}") or {}).get("associatedPullRequests") or {}).get("nodes", [])
+                prs_by_sha[sha] = _format_pull_requests(pr_nodes)
         
-    except Exception as e:
-        print(f"Error fetching PRs: {str(e)}")
-        return []
+        except Exception as e:
+            logger.warning("Error fetching PRs: %s", e)
+            for sha in batch:
+                prs_by_sha[sha] = []
+    
+    return prs_by_sha
 
-def _format_blame_info(blame_range: Dict, line_number: int, pull_requests: List[Dict] = None) -> Dict:
+def _format_blame_info(blame_range: Dict, line_number: int, pull_requests: List[Dict] = None,
+                       now_utc: Optional[datetime] = None) -> Dict:
     """Format GraphQL blame range into structured information"""
     
     commit = blame_range["commit"]
@@ -460,8 +1157,9 @@ def _format_blame_info(blame_range: Dict, line_number: int, pull_requests: List[
     # Calculate age in days from commit date
     commit_date_str = commit.get("committedDate", "")
     if commit_date_str:
-        commit_date = datetime.fromisoformat(commit_date_str.replace('Z', '+00:00'))
-        age_days = (datetime.now(commit_date.tzinfo) - commit_date).days
+        # fromisoformat accepts the trailing 'Z' on Python 3.11+
+        commit_date = datetime.fromisoformat(commit_date_str)
+        age_days = ((now_utc or datetime.now(timezone.utc)) - commit_date).days
     else:
         age_days = 0
     
@@ -479,21 +1177,14 @@ def _format_blame_info(blame_range: Dict, line_number: int, pull_requests: List[
         "commit": {
             "sha": commit["oid"],
             "short_sha": commit["oid"][:7],
-            "message": commit["message"],
             "headline": commit["messageHeadline"],
             "body": commit.get("messageBody", ""),
             "committed_date": commit.get("committedDate", ""),
-            "pushed_date": commit.get("pushedDate"),
             "url": commit["url"],
             "author": {
                 "name": author.get("name", "Unknown") if author else "Unknown",
                 "email": author.get("email", "") if author else "",
-                "github_username": user.get("login", "N/A") if user else "N/A",
-                "github_url": user.get("url") if user else None
-            },
-            "committer": {
-                "name": commit.get("committer", {}).get("name", ""),
-                "email": commit.get("committer", {}).get("email", "")
+                "github_username": user.get("login", "N/A") if user else "N/A"
             },
             "stats": {
                 "additions": commit.get("additions", 0),
@@ -508,7 +1199,7 @@ def _format_blame_info(blame_range: Dict, line_number: int, pull_requests: List[
 # TOOL 1: Git Blame Analysis
 # ============================================================================
 
-def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
+def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever, cache_dir: Optional[str] = None):
     """Factory function to create git blame tool with injected secret retriever.
     
     This factory uses closure pattern to inject the secret_retriever dependency.
@@ -517,11 +1208,19 @@ def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
     
     Args:
         secret_retriever: ISecretRetriever instance for fetching GitHub credentials
+        cache_dir: Optional directory for a persistent blame cache. When set, blame
+                   computed for a branch head is reused across process restarts until
+                   the branch moves.
         
     Returns:
-        Configured tool instance that AI agents can call with (repo, file_path, line_number, branch)
+        Configured tool instance that AI agents can call with (repo, file_path, line_number, branch, detail)
     """
-    async def get_git_blame_for_line(repo: str, file_path: str, line_number: int, branch: Optional[str] = None) -> Dict[str, Any]:
+    disk_cache = _BlameDiskCache(cache_dir) if cache_dir else None
+    
+    get_token = _cached_github_token(secret_retriever)
+
+    async def get_git_blame_for_line(repo: str, file_path: str, line_number: int, branch: Optional[str] = None,
+                                     detail: PRDetail = "summary") -> Dict[str, Any]:
         """Find who last modified a specific line of code and get the associated pull request information.
         
         This tool uses GitHub's GraphQL API to perform git blame analysis on a specific line in a file.
@@ -547,6 +1246,9 @@ def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
                         Must be a valid line number within the file.
             branch: Optional branch name to check. If not provided, defaults to the
                    'develop' branch.
+            detail: How much pull request information to include:
+                    - "summary" (default): core PR fields only (number, title, state, author, dates, stats)
+                    - "full": additionally PR labels, review count and commit count
         
         Returns:
             Dict[str, Any]: Comprehensive blame information including:
@@ -613,14 +1315,13 @@ def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
             - Line numbers are 1-indexed (first line = 1, not 0)
             - The tool shows the most recent change to the line
             - Pull request information is included automatically when available
+            - Request detail="full" only when PR labels or review/commit counts are needed
             - Works with both public and private repositories (with proper access)
             - Automatically retries on transient API failures
         """
         try:
             # Get GitHub token from secrets
-            token = await secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN")
-            if not token:
-                token = await secret_retriever.retrieve_optional_secret_value("GITHUB_PAT")
+            token = await get_token()
             
             if not token:
                 return {"error": "GitHub token not found. Required: GITHUB_TOKEN or GITHUB_PAT", 
@@ -633,22 +1334,19 @@ def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
             if not branch:
                 branch = "develop"
             
-            # Validate file exists
-            try:
-                github = Github(token)
-                repo_obj = github.get_repo(repo_name)
-                repo_obj.get_contents(file_path, ref=branch)
-            except Exception as file_error:
-                if "404" in str(file_error):
-                    return {"error": f"File '{file_path}' not found in repository: {str(file_error)}", 
-                            "repo": repo_name, "file_path": file_path, "line_number": line_number}
-                raise
-            
-            # Execute GraphQL blame query
-            blame_info = _get_graphql_blame_for_line(token, owner, repo_short, 
-                                                     file_path, line_number, branch)
+            # Blocking HTTP helpers run in worker threads so concurrent tool calls overlap.
+            # The existence probe only explains a failed blame, so it is sent only then; a
+            # started worker thread cannot be cancelled, so probing alongside the blame would
+            # cost a request (and a rate-limiter slot) even on cache hits.
+            blame_info = await asyncio.to_thread(_get_graphql_blame_for_line, token, owner, repo_short,
+                                                 file_path, line_number, branch, pr_detail=detail,
+                                                 disk_cache=disk_cache)
             
             if not blame_info:
+                # Validate file exists
+                if not await asyncio.to_thread(_file_exists, token, owner, repo_short, file_path, branch):
+                    return {"error": f"File '{file_path}' not found in repository: {repo_name}@{branch}", 
+                            "repo": repo_name, "file_path": file_path, "line_number": line_number}
                 return {"error": "Could not retrieve blame information", "repo": repo_name, 
                         "file_path": file_path, "line_number": line_number}
             
@@ -673,9 +1371,10 @@ def create_get_git_blame_for_line_tool(secret_retriever: ISecretRetriever):
             return {"error": str(e), "error_type": type(e).__name__, "repo": repo, 
                     "file_path": file_path, "line_number": line_number}
     
-    def sync_wrapper(repo: str, file_path: str, line_number: int, branch: Optional[str] = None) -> Dict[str, Any]:
+    def sync_wrapper(repo: str, file_path: str, line_number: int, branch: Optional[str] = None,
+                     detail: PRDetail = "summary") -> Dict[str, Any]:
         """Sync wrapper that runs the async function."""
-        return run_async_in_sync_context(get_git_blame_for_line, repo, file_path, line_number, branch)
+        return run_async_in_sync_context(get_git_blame_for_line, repo, file_path, line_number, branch, detail)
     
     sync_wrapper.__doc__ = get_git_blame_for_line.__doc__
     
@@ -703,6 +1402,8 @@ def create_get_commit_details_by_sha_tool(secret_retriever: ISecretRetriever):
     Returns:
         Configured tool instance that AI agents can call with (repo, commit_sha)
     """
+    get_token = _cached_github_token(secret_retriever)
+
     async def get_commit_details_by_sha(repo: str, commit_sha: str) -> Dict[str, Any]:
         """Get complete information about a specific GitHub commit including all changed files and statistics.
         
@@ -797,38 +1498,49 @@ def create_get_commit_details_by_sha_tool(secret_retriever: ISecretRetriever):
             - Works with both public and private repositories (with proper access)
         """
         try:
-            token = await secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN")
-            if not token:
-                token = await secret_retriever.retrieve_optional_secret_value("GITHUB_PAT")
+            token = await get_token()
             
             if not token:
                 return {"error": "GitHub token not found. Required: GITHUB_TOKEN or GITHUB_PAT", 
                         "repo": repo, "commit_sha": commit_sha}
             
             repo_name = _parse_repo_identifier(repo)
-            github = Github(token)
-            repo_obj = github.get_repo(repo_name)
-            commit = repo_obj.get_commit(commit_sha)
+            commit_sha = _resolve_known_sha(token, repo_name, commit_sha)
+            cache_key = (_credential_fingerprint(token), repo_name.lower(), commit_sha.lower())
+            cached = _commit_details_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            files_list = [{"filename": f.filename, "status": f.status, "additions": f.additions, 
-                          "deletions": f.deletions, "changes": f.changes, 
-                          "patch": f.patch[:500] if f.patch else None} for f in commit.files]
+            commit, total_files = await asyncio.to_thread(_fetch_commit, token, repo_name, commit_sha)
+            git_commit = commit["commit"]
+            subject, _, body = git_commit["message"].partition("\n")
             
-            return {
-                "status": "success", "repo": repo_name, "sha": commit.sha, "short_sha": commit.sha[:7],
-                "author": {"name": commit.commit.author.name, "email": commit.commit.author.email,
-                          "github": commit.author.login if commit.author else None, 
-                          "date": commit.commit.author.date.isoformat()},
-                "committer": {"name": commit.commit.committer.name, "email": commit.commit.committer.email,
-                             "date": commit.commit.committer.date.isoformat()},
-                "message": {"subject": commit.commit.message.split("\n")[0],
-                           "body": "\n".join(commit.commit.message.split("\n")[1:]).strip()},
-                "stats": {"additions": commit.stats.additions, "deletions": commit.stats.deletions,
-                         "total": commit.stats.total, "files_changed": len(files_list)},
-                "files": files_list[:20], "total_files": len(files_list),
-                "parents": [p.sha for p in commit.parents], "url": commit.html_url,
-                "verified": commit.commit.verification.verified if hasattr(commit.commit, 'verification') else False
+            # Only the first 20 files are returned, so only those are turned into rows
+            files = commit.get("files", [])
+            files_list = [{"filename": f["filename"], "status": f["status"], "additions": f["additions"], 
+                          "deletions": f["deletions"], "changes": f["changes"], 
+                          "patch": f["patch"][:500] if f.get("patch") else None} for f in files[:20]]
+            
+            result = {
+                "status": "success", "repo": repo_name, "sha": commit["sha"], "short_sha": commit["sha"][:7],
+                "author": {"name": git_commit["author"]["name"], "email": git_commit["author"]["email"],
+                          "github": commit["author"]["login"] if commit.get("author") else None, 
+                          "date": git_commit["author"]["date"]},
+                "committer": {"name": git_commit["committer"]["name"], "email": git_commit["committer"]["email"],
+                             "date": git_commit["committer"]["date"]},
+                "message": {"subject": subject, "body": body.strip()},
+                "stats": {"additions": commit["stats"]["additions"], "deletions": commit["stats"]["deletions"],
+                         "total": commit["stats"]["total"], "files_changed": total_files},
+                "files": files_list, "total_files": total_files,
+                "parents": [p["sha"] for p in commit["parents"]], "url": commit["html_url"],
+                "verified": (git_commit.get("verification") or {}).get("verified", False)
             }
+            # Details are stored under the full SHA; an abbreviated SHA only maps to it for a
+            # short while, since it could become ambiguous as the repository grows
+            _commit_details_cache.put(cache_key[:2] + (commit["sha"].lower(),), result, None)
+            if not _is_full_sha(commit_sha):
+                _short_sha_map.put(cache_key, commit["sha"], _SHORT_SHA_TTL_SECONDS)
+            return result
         except Exception as e:
             return {"error": str(e), "error_type": type(e).__name__, "repo": repo, "commit_sha": commit_sha}
     
@@ -862,6 +1574,8 @@ def create_get_pull_requests_for_commit_tool(secret_retriever: ISecretRetriever)
     Returns:
         Configured tool instance that AI agents can call with (repo, commit_sha)
     """
+    get_token = _cached_github_token(secret_retriever)
+
     async def get_pull_requests_for_commit(repo: str, commit_sha: str) -> List[Dict[str, Any]]:
         """Find all pull requests associated with a specific commit.
         
@@ -962,36 +1676,50 @@ def create_get_pull_requests_for_commit_tool(secret_retriever: ISecretRetriever)
             - Works with both public and private repositories (with proper access)
         """
         try:
-            token = await secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN")
-            if not token:
-                token = await secret_retriever.retrieve_optional_secret_value("GITHUB_PAT")
+            token = await get_token()
             
             if not token:
                 return {"error": "GitHub token not found. Required: GITHUB_TOKEN or GITHUB_PAT", 
                         "repo": repo, "commit_sha": commit_sha, "pull_requests": []}
             
             repo_name = _parse_repo_identifier(repo)
-            github = Github(token)
-            repo_obj = github.get_repo(repo_name)
-            commit = repo_obj.get_commit(commit_sha)
-            pulls = commit.get_pulls()
+            commit_sha = _resolve_known_sha(token, repo_name, commit_sha)
+            cache_key = (_credential_fingerprint(token), repo_name.lower(), commit_sha.lower())
+            cached = _commit_pulls_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            response = await asyncio.to_thread(_rest_get, token, f"/repos/{repo_name}/commits/{commit_sha}/pulls",
+                                               {"per_page": 100})
+            numbers = [pr["number"] for pr in response.json()]
+            
+            # The commit/pulls listing omits merge and diff stats; fetch each full PR and its
+            # reviews concurrently instead of one round trip after another
+            detail_responses, review_counts = await asyncio.gather(
+                asyncio.gather(*(asyncio.to_thread(_rest_get, token, f"/repos/{repo_name}/pulls/{number}")
+                                 for number in numbers)),
+                asyncio.gather(*(asyncio.to_thread(_fetch_review_count, token, repo_name, number)
+                                 for number in numbers))
+            )
             
             pr_list = [{
-                "number": pr.number, "title": pr.title, "state": pr.state, "merged": pr.merged,
-                "author": pr.user.login if pr.user else "Unknown",
-                "created_at": pr.created_at.isoformat(),
-                "merged_at": pr.merged_at.isoformat() if pr.merged_at else None,
-                "closed_at": pr.closed_at.isoformat() if pr.closed_at else None,
-                "url": pr.html_url, "body": pr.body[:500] if pr.body else "No description",
-                "labels": [l.name for l in pr.labels],
-                "base_branch": pr.base.ref, "head_branch": pr.head.ref,
-                "stats": {"commits": pr.commits, "additions": pr.additions, 
-                         "deletions": pr.deletions, "changed_files": pr.changed_files},
-                "review_count": pr.get_reviews().totalCount if hasattr(pr, 'get_reviews') else 0
-            } for pr in pulls]
+                "number": pr["number"], "title": pr["title"], "state": pr["state"], "merged": pr["merged"],
+                "author": pr["user"]["login"] if pr.get("user") else "Unknown",
+                "created_at": pr["created_at"],
+                "merged_at": pr["merged_at"],
+                "closed_at": pr["closed_at"],
+                "url": pr["html_url"], "body": pr["body"][:500] if pr.get("body") else "No description",
+                "labels": [l["name"] for l in pr["labels"]],
+                "base_branch": pr["base"]["ref"], "head_branch": pr["head"]["ref"],
+                "stats": {"commits": pr["commits"], "additions": pr["additions"], 
+                         "deletions": pr["deletions"], "changed_files": pr["changed_files"]},
+                "review_count": review_count
+            } for pr, review_count in zip((r.json() for r in detail_responses), review_counts)]
             
-            return {"status": "success", "repo": repo_name, "commit_sha": commit_sha, 
-                    "pull_requests": pr_list, "count": len(pr_list)}
+            result = {"status": "success", "repo": repo_name, "commit_sha": commit_sha, 
+                      "pull_requests": pr_list, "count": len(pr_list)}
+            _commit_pulls_cache.put(cache_key, result, _PULL_REQUESTS_TTL_SECONDS)
+            return result
         except Exception as e:
             return {"error": str(e), "error_type": type(e).__name__, 
                     "repo": repo, "commit_sha": commit_sha, "pull_requests": []}
@@ -1026,6 +1754,8 @@ def create_search_code_in_repo_tool(secret_retriever: ISecretRetriever):
     Returns:
         Configured tool instance that AI agents can call with (repo, query, file_extension, path)
     """
+    get_token = _cached_github_token(secret_retriever)
+
     async def search_code_in_repo(repo: str, query: str, file_extension: Optional[str] = None, 
                                   path: Optional[str] = None) -> Dict[str, Any]:
         """Search for code patterns, classes, functions, or text across a GitHub repository.
@@ -1128,29 +1858,28 @@ def create_search_code_in_repo_tool(secret_retriever: ISecretRetriever):
             - Works with both public and private repositories (with proper access)
         """
         try:
-            token = await secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN")
-            if not token:
-                token = await secret_retriever.retrieve_optional_secret_value("GITHUB_PAT")
+            token = await get_token()
             
             if not token:
                 return {"error": "GitHub token not found. Required: GITHUB_TOKEN or GITHUB_PAT", 
                         "repo": repo, "query": query}
             
             repo_name = _parse_repo_identifier(repo)
-            github = Github(token)
             
             search_query = f"{query} repo:{repo_name}"
             if file_extension: search_query += f" extension:{file_extension}"
             if path: search_query += f" path:{path}"
             
-            results = github.search_code(query=search_query)
-            items = [{"name": item.name, "path": item.path, "sha": item.sha, 
-                     "url": item.html_url, "repository": item.repository.full_name} 
-                    for item in list(results)[:20]]
+            # Only the first 20 hits are returned, so request just that page
+            response = await asyncio.to_thread(_rest_get, token, "/search/code", {"q": search_query, "per_page": 20})
+            results = response.json()
+            items = [{"name": item["name"], "path": item["path"], "sha": item["sha"], 
+                     "url": item["html_url"], "repository": item["repository"]["full_name"]} 
+                    for item in results["items"]]
             
             return {"status": "success", "repo": repo_name, "query": query,
                     "filters": {"file_extension": file_extension, "path": path},
-                    "total_count": results.totalCount, "returned_count": len(items), "results": items}
+                    "total_count": results["total_count"], "returned_count": len(items), "results": items}
         except Exception as e:
             return {"error": str(e), "error_type": type(e).__name__, "repo": repo, "query": query}
     
@@ -1185,6 +1914,8 @@ def create_get_file_content_at_line_tool(secret_retriever: ISecretRetriever):
     Returns:
         Configured tool instance that AI agents can call with (repo, file_path, line_number, context_lines, branch)
     """
+    get_token = _cached_github_token(secret_retriever)
+
     async def get_file_content_at_line(repo: str, file_path: str, line_number: int, 
                                       context_lines: int = 5, branch: Optional[str] = None) -> Dict[str, Any]:
         """Get file content around a specific line with configurable context window.
@@ -1292,28 +2023,34 @@ def create_get_file_content_at_line_tool(secret_retriever: ISecretRetriever):
             - Context window is automatically adjusted if near file start/end
             - Maximum context_lines is not limited, but large values may return lots of data
             - Binary files cannot be read (will return error)
-            - Very large files (>100MB) may timeout
+            - Files over 1 MB cannot be read (GitHub contents API limit; will return error)
             - Works with both public and private repositories (with proper access)
         """
         try:
-            token = await secret_retriever.retrieve_optional_secret_value("GITHUB_TOKEN")
-            if not token:
-                token = await secret_retriever.retrieve_optional_secret_value("GITHUB_PAT")
+            token = await get_token()
             
             if not token:
                 return {"error": "GitHub token not found. Required: GITHUB_TOKEN or GITHUB_PAT", 
                         "repo": repo, "file_path": file_path, "line_number": line_number}
             
             repo_name = _parse_repo_identifier(repo)
-            github = Github(token)
-            repo_obj = github.get_repo(repo_name)
             
             # Use 'develop' branch if not specified
             if not branch:
                 branch = "develop"
             
-            file_content_obj = repo_obj.get_contents(file_path, ref=branch)
-            content = file_content_obj.decoded_content.decode('utf-8')
+            response = await asyncio.to_thread(_rest_get, token, f"/repos/{repo_name}/contents/{quote(file_path)}",
+                                               {"ref": branch})
+            file_info = response.json()
+            if isinstance(file_info, list) or file_info.get("type") != "file":
+                return {"error": f"'{file_path}' is not a file in repository: {repo_name}@{branch}",
+                        "repo": repo_name, "file_path": file_path, "line_number": line_number}
+            if file_info.get("encoding") != "base64":
+                # The contents API only inlines files up to 1 MB
+                return {"error": f"File '{file_path}' is too large to read through the contents API",
+                        "repo": repo_name, "file_path": file_path, "line_number": line_number}
+            
+            content = base64.b64decode(file_info["content"]).decode('utf-8')
             lines = content.split('\n')
             
             if line_number < 1 or line_number > len(lines):
@@ -1331,7 +2068,7 @@ def create_get_file_content_at_line_tool(secret_retriever: ISecretRetriever):
                 "line_number": line_number, "target_line": lines[line_number - 1].strip(),
                 "context": context, "start_line": start_line, "end_line": end_line, "total_lines": len(lines),
                 "language": file_path.split('.')[-1] if '.' in file_path else "unknown",
-                "size": file_content_obj.size, "url": file_content_obj.html_url
+                "size": file_info["size"], "url": file_info["html_url"]
             }
         except Exception as e:
             return {"error": str(e), "error_type": type(e).__name__, 